@@ -1,12 +1,120 @@
 from django.contrib import admin
-from .models import Customer, Loan
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.text import smart_split, unescape_string_literal
+from .models import Customer, Loan, EligibilityDecision
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that takes the row count of an unfiltered changelist from
+    PostgreSQL's planner statistics instead of running COUNT(*) over the
+    whole table. Small tables and filtered lists still get an exact count.
+    """
+    # Below this many estimated rows an exact count is cheap enough
+    exact_count_threshold = 100000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        connection = connections[queryset.db] if query is not None else None
+        if connection is not None and connection.vendor == 'postgresql' and not query.where:
+            table = queryset.model._meta.db_table
+            with connection.cursor() as cursor:
+                # Partitioned tables keep their statistics on the partitions,
+                # so add those up too (the parent itself reports -1 or 0).
+                cursor.execute(
+                    "SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)::bigint FROM pg_class c "
+                    "WHERE c.oid = %s::regclass "
+                    "OR c.oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)",
+                    [table, table]
+                )
+                estimate = cursor.fetchone()[0]
+            if estimate >= self.exact_count_threshold:
+                return estimate
+        return super().count
+
+
+class IndexedSearchMixin:
+    """
+    Keeps admin search on indexes. Numeric terms match `id_search_fields`
+    exactly (primary/foreign key lookups) instead of casting every ID to
+    text; other terms are matched against the remaining `search_fields`
+    with icontains, which PostgreSQL serves from trigram indexes
+    (see migration 0005).
+    """
+    id_search_fields = ()
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+
+        if term.isdigit():
+            # IDs are 32-bit integer columns; larger numbers can't match.
+            if int(term) > 2 ** 31 - 1:
+                return queryset.none(), False
+            id_query = Q()
+            for field in self.id_search_fields:
+                id_query |= Q(**{field: int(term)})
+            return queryset.filter(id_query), False
+
+        text_fields = [field for field in self.get_search_fields(request) if field not in self.id_search_fields]
+        if not text_fields:
+            return queryset.none(), False
+        for bit in smart_split(term):
+            if bit.startswith(('"', "'")) and bit[0] == bit[-1]:
+                bit = unescape_string_literal(bit)
+            bit_query = Q()
+            for field in text_fields:
+                bit_query |= Q(**{f'{field}__icontains': bit})
+            queryset = queryset.filter(bit_query)
+        return queryset, False
+
 
 @admin.register(Customer)
-class CustomerAdmin(admin.ModelAdmin):
+class CustomerAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('customer_id', 'first_name', 'last_name', 'monthly_salary', 'approved_limit', 'current_debt')
     search_fields = ('first_name', 'last_name', 'customer_id')
+    id_search_fields = ('customer_id',)
+    paginator = EstimatedCountPaginator
+    # Skip the second COUNT(*) over the whole table on filtered pages
+    show_full_result_count = False
 
 @admin.register(Loan)
-class LoanAdmin(admin.ModelAdmin):
+class LoanAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('loan_id', 'customer', 'loan_amount', 'interest_rate', 'tenure', 'end_date')
-    search_fields = ('loan_id', 'customer__customer_id')
\ No newline at end of file
+    # Fetch each row's customer in the same query instead of one query per row
+    list_select_related = ('customer',)
+    search_fields = ('loan_id', 'customer__customer_id')
+    id_search_fields = ('loan_id', 'customer__customer_id')
+    # Avoid a customer dropdown with every customer on the edit page
+    raw_id_fields = ('customer',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+@admin.register(EligibilityDecision)
+class EligibilityDecisionAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    list_display = ('decided_at', 'customer_id', 'loan_amount', 'tenure', 'credit_score', 'approval', 'reason')
+    # reason has declared choices, so its filter lists them instead of
+    # running a DISTINCT over the whole log.
+    list_filter = ('approval', 'reason')
+    search_fields = ('customer_id',)
+    id_search_fields = ('customer_id',)
+    # Newest first, along api_decision_time_idx
+    ordering = ('-decided_at',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    # The log is an audit trail: it can be read here but never edited.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,246 @@
+import atexit
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+logger = logging.getLogger(__name__)
+
+# Write-behind audit log of eligibility decisions (see EligibilityDecision).
+#
+# record() only appends a dict to an in-process buffer. A background
+# flusher thread (one per process, started on the first decision) hands
+# the buffer to flush_decision_log_task in batches of DECISION_LOG_BATCH_SIZE,
+# as soon as a batch is full or the oldest decision has waited
+# DECISION_LOG_FLUSH_SECONDS, and the task stores each batch with one
+# bulk_create. Requests never wait on the broker or the database.
+#
+# If the broker is unavailable, batches stay in the buffer and the flusher
+# retries every DECISION_LOG_FLUSH_SECONDS. The buffer holds at most
+# DECISION_LOG_MAX_BUFFER decisions. When it is full, the request that
+# records the next decision writes the oldest batch to the database itself.
+# This backpressure bounds memory without dropping decisions (unless the
+# database is down too), at the cost of latency while the broker is down.
+#
+# Anything still buffered at a clean interpreter exit is flushed. A process
+# that is killed outright (SIGKILL, OOM) loses at most the decisions of the
+# last DECISION_LOG_FLUSH_SECONDS, plus whatever a broker outage held back.
+
+BATCH_SIZE = 1000
+
+_lock = threading.Lock()
+_buffer = deque()
+# time.monotonic() when the oldest buffered decision was recorded
+_oldest = None
+# time.monotonic() before which no hand-off is attempted after a failed one
+_retry_at = 0
+# Set to wake the flusher early: a new deadline (first decision) or a full batch
+_wake = threading.Event()
+# PID of the process the flusher thread was started in (threads don't survive fork)
+_flusher_pid = None
+
+
+def record(customer_id, loan_amount, interest_rate, tenure, result, reason,
+           credit_score=None, score_components=None, monthly_salary=None, current_debt=None):
+    """
+    Buffers one decision. Amounts are integer paise and rates basis points;
+    `result` is the dict returned by check_loan_eligibility.
+    """
+    global _oldest
+    entry = {
+        'decision_id': str(uuid.uuid4()),
+        'decided_at': timezone.now().isoformat(),
+        'customer_id': customer_id,
+        'loan_amount': loan_amount,
+        'interest_rate': interest_rate,
+        'tenure': tenure,
+        'monthly_salary': monthly_salary,
+        'current_debt': current_debt,
+        'credit_score': credit_score,
+        'score_components': score_components or {},
+        'approval': result['approval'],
+        'reason': reason,
+        'corrected_interest_rate': result.get('corrected_interest_rate'),
+        'monthly_installment': result.get('monthly_installment') or 0,
+    }
+    _ensure_flusher()
+    overflow = None
+    with _lock:
+        if not _buffer:
+            _oldest = time.monotonic()
+            # Let the flusher set its deadline from this decision
+            _wake.set()
+        _buffer.append(entry)
+        if len(_buffer) >= settings.DECISION_LOG_MAX_BUFFER:
+            overflow = _take(settings.DECISION_LOG_BATCH_SIZE)
+        elif len(_buffer) >= settings.DECISION_LOG_BATCH_SIZE:
+            _wake.set()
+    if overflow:
+        # Backpressure: the queue is not draining, so this caller pays for the write.
+        _write_or_drop(overflow)
+
+
+def _take(count):
+    """
+    Removes up to `count` of the oldest decisions from the buffer. Call with _lock held.
+    """
+    global _oldest
+    batch = [_buffer.popleft() for _ in range(min(count, len(_buffer)))]
+    _oldest = time.monotonic() if _buffer else None
+    return batch
+
+
+def _queue(batch):
+    from .tasks import flush_decision_log_task
+
+    # No retries, neither for the publish nor for connecting (kombu retries
+    # a refused connection for seconds by default); the flusher retries
+    # on its own schedule.
+    app = flush_decision_log_task.app
+    with app.connection_for_write(transport_options={'max_retries': 0}) as connection:
+        flush_decision_log_task.apply_async(args=[batch], connection=connection, retry=False)
+
+
+def _hand_off(batch) -> bool:
+    """
+    Queues a batch for the flush task, or puts it back at the front of the
+    buffer (and waits DECISION_LOG_FLUSH_SECONDS before trying again) if
+    the broker is unavailable. Returns whether the batch was queued.
+    """
+    global _oldest, _retry_at
+    try:
+        _queue(batch)
+        return True
+    except Exception as e:
+        logger.warning(f"Could not queue {len(batch)} eligibility decisions, keeping them buffered: {e}")
+        with _lock:
+            _buffer.extendleft(reversed(batch))
+            _oldest = _oldest or time.monotonic()
+            _retry_at = time.monotonic() + settings.DECISION_LOG_FLUSH_SECONDS
+        return False
+
+
+def flush_due():
+    """
+    Hands off every batch that is full or has waited DECISION_LOG_FLUSH_SECONDS.
+    Called by the flusher thread.
+    """
+    while True:
+        with _lock:
+            now = time.monotonic()
+            due = _buffer and now >= _retry_at and (
+                len(_buffer) >= settings.DECISION_LOG_BATCH_SIZE
+                or now - _oldest >= settings.DECISION_LOG_FLUSH_SECONDS
+            )
+            if not due:
+                return
+            batch = _take(settings.DECISION_LOG_BATCH_SIZE)
+        if not _hand_off(batch):
+            return
+
+
+def _seconds_until_due():
+    with _lock:
+        now = time.monotonic()
+        interval = settings.DECISION_LOG_FLUSH_SECONDS
+        if not _buffer:
+            return interval
+        return max(_retry_at - now, _oldest + interval - now, 0.01)
+
+
+def _run_flusher():
+    while True:
+        _wake.wait(timeout=_seconds_until_due())
+        _wake.clear()
+        try:
+            flush_due()
+        except Exception:
+            # Keep the thread alive; the decisions stay buffered for the next try.
+            logger.exception("Eligibility decision flusher failed")
+
+
+def _ensure_flusher():
+    global _flusher_pid
+    if _flusher_pid == os.getpid():
+        return
+    with _lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_run_flusher, name='decision-log-flusher', daemon=True).start()
+
+
+def _after_fork_in_child():
+    # A forked worker starts empty: the parent still owns (and flushes) the
+    # decisions buffered before the fork, and the flusher must be restarted.
+    global _lock, _wake, _oldest, _retry_at
+    _lock = threading.Lock()
+    _wake = threading.Event()
+    _buffer.clear()
+    _oldest = None
+    _retry_at = 0
+
+
+def _write_or_drop(batch):
+    try:
+        write_decisions(batch)
+    except Exception as e:
+        logger.error(f"Lost {len(batch)} eligibility decisions: {e}")
+
+
+def write_decisions(entries) -> int:
+    """
+    Stores buffered decisions. Decisions already stored (e.g. from a
+    redelivered task) are skipped. Returns the number of entries passed in.
+    """
+    from .models import EligibilityDecision
+
+    decisions = [
+        EligibilityDecision(**{**entry, 'decided_at': parse_datetime(entry['decided_at'])})
+        for entry in entries
+    ]
+    EligibilityDecision.objects.bulk_create(decisions, batch_size=BATCH_SIZE, ignore_conflicts=True)
+    return len(decisions)
+
+
+def pending() -> int:
+    """
+    Number of decisions buffered in this process.
+    """
+    return len(_buffer)
+
+
+def flush():
+    """
+    Hands every buffered decision to the flush task, writing them directly
+    if the broker is unavailable.
+    """
+    while True:
+        with _lock:
+            batch = _take(settings.DECISION_LOG_BATCH_SIZE)
+        if not batch:
+            return
+        try:
+            _queue(batch)
+        except Exception:
+            _write_or_drop(batch)
+
+
+def clear():
+    """
+    Discards buffered decisions without storing them.
+    """
+    global _oldest, _retry_at
+    with _lock:
+        _buffer.clear()
+        _oldest = None
+        _retry_at = 0
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+atexit.register(flush)
@@ -0,0 +1,316 @@
+import hashlib
+import logging
+from decimal import Decimal
+from pathlib import Path
+from django.db import transaction
+from .models import Customer, Loan, IngestedFile, IngestedRow
+
+logger = logging.getLogger(__name__)
+
+# Delta ingestion: each input file is fingerprinted as a whole (skip it if
+# unchanged) and row by row (IngestedRow), so a run only inserts, updates
+# or deletes the rows that differ from the previous load.
+#
+# Inputs can be Excel workbooks, CSV, Parquet or Arrow IPC (Feather v2)
+# files with the same column headers. Only the mapped columns are read, and
+# CSV/Parquet/Arrow are processed in chunks so large books don't have to fit
+# in memory at once.
+#
+# pandas (and NumPy/openpyxl/pyarrow behind it) is imported inside the
+# functions that use it: this module is loaded by api.tasks in every web and
+# worker process, and most of them never ingest anything.
+
+CUSTOMER_COLUMNS = [
+    'Customer ID', 'First Name', 'Last Name', 'Age', 'Phone Number', 'Monthly Salary', 'Approved Limit'
+]
+LOAN_COLUMNS = [
+    'Customer ID', 'Loan ID', 'Loan Amount', 'Tenure', 'Interest Rate', 'Monthly payment',
+    'EMIs paid on Time', 'Date of Approval', 'End Date'
+]
+LOAN_DATE_COLUMNS = ['Date of Approval', 'End Date']
+
+# current_debt is maintained by the services layer, so updates leave it alone.
+CUSTOMER_UPDATE_FIELDS = ['first_name', 'last_name', 'age', 'phone_number', 'monthly_salary', 'approved_limit']
+LOAN_UPDATE_FIELDS = [
+    'customer', 'loan_amount', 'tenure', 'interest_rate', 'monthly_repayment',
+    'emis_paid_on_time', 'start_date', 'end_date'
+]
+
+BATCH_SIZE = 1000
+
+FORMATS = ('xlsx', 'csv', 'parquet', 'arrow')
+_EXTENSIONS = {
+    '.xlsx': 'xlsx',
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+}
+# Rows per chunk for the formats that can be read incrementally
+CHUNK_ROWS = 100000
+
+
+def detect_format(path) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix not in _EXTENSIONS:
+        raise ValueError(f"Cannot tell the format of '{path}'; pass one of: {', '.join(FORMATS)}.")
+    return _EXTENSIONS[suffix]
+
+
+def _raw_chunks(path, columns, file_format):
+    """
+    Yields DataFrames with (at most) the requested columns, in the file's own types.
+    """
+    import pandas as pd
+
+    wanted = set(columns)
+    if file_format == 'xlsx':
+        # openpyxl has to load the whole sheet; only project the columns.
+        yield pd.read_excel(path, engine='openpyxl', usecols=lambda column: column in wanted)
+    elif file_format == 'csv':
+        yield from pd.read_csv(path, usecols=lambda column: column in wanted, chunksize=CHUNK_ROWS)
+    elif file_format == 'parquet':
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(path, memory_map=True)
+        present = [column for column in columns if column in parquet_file.schema_arrow.names]
+        for batch in parquet_file.iter_batches(batch_size=CHUNK_ROWS, columns=present):
+            yield batch.to_pandas()
+    elif file_format == 'arrow':
+        import pyarrow as pa
+        # Memory-mapped, so record batches are read straight from the page cache.
+        reader = pa.ipc.open_file(pa.memory_map(str(path), 'r'))
+        present = [column for column in columns if column in reader.schema.names]
+        for index in range(reader.num_record_batches):
+            yield reader.get_batch(index).select(present).to_pandas()
+    else:
+        raise ValueError(f"Unsupported format '{file_format}'; expected one of: {', '.join(FORMATS)}.")
+
+
+def read_chunks(path, columns, file_format=None, optional=(), date_columns=()):
+    """
+    Reads an input file as a sequence of DataFrames holding exactly `columns`,
+    in that order. Missing `optional` columns are filled with None and
+    `date_columns` are parsed to datetimes, so every format yields the same shape.
+    Raises ValueError if a required column is missing.
+    """
+    import pandas as pd
+
+    file_format = file_format or detect_format(path)
+    for chunk in _raw_chunks(path, columns, file_format):
+        missing = [column for column in columns if column not in chunk.columns and column not in optional]
+        if missing:
+            raise ValueError(f"'{path}' is missing required columns: {', '.join(missing)}")
+        for column in optional:
+            if column not in chunk.columns:
+                chunk[column] = None
+        for column in date_columns:
+            chunk[column] = pd.to_datetime(chunk[column])
+        yield chunk[columns]
+
+
+def file_hash(path) -> str:
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def row_hashes(df):
+    """
+    One 64-bit content hash per row, computed column-wise by pandas.
+    Returned as signed integers to fit a BigIntegerField.
+    """
+    import pandas as pd
+    return pd.util.hash_pandas_object(df, index=False).to_numpy().view('int64').tolist()
+
+
+def _batches(items, size=BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _existing_keys(model, keys):
+    existing = set()
+    for batch in _batches(keys):
+        existing.update(model.objects.filter(pk__in=batch).values_list('pk', flat=True))
+    return existing
+
+
+def _manifest_hashes(dataset, keys):
+    hashes = {}
+    for batch in _batches(keys):
+        hashes.update(
+            IngestedRow.objects.filter(dataset=dataset, key__in=batch).values_list('key', 'row_hash')
+        )
+    return hashes
+
+
+def _apply_delta(dataset, model, chunks, key_column, build_instance, update_fields, full=False):
+    """
+    Writes the rows whose hash differs from the manifest, deletes rows that
+    disappeared from the file and brings the manifest up to date.
+    Each chunk is written before the next one is read, so only one chunk's
+    rows (and model instances for the rows that changed in it) are held at
+    a time, plus the set of keys seen so far to detect deletions.
+
+    Rows that exist in the table but not in the manifest (e.g. customers
+    registered through the API) are only taken over by the file on the
+    first load, when the manifest is still empty, or with full=True.
+    Otherwise a file row with the same key is skipped and logged, so a
+    colliding ID never overwrites data the file does not own.
+    """
+    adopt_untracked = full or not IngestedRow.objects.filter(dataset=dataset).exists()
+    seen = set()
+    created = updated = 0
+    for chunk in chunks:
+        chunk_hashes = row_hashes(chunk)
+        keys = chunk[key_column].tolist()
+        seen.update(keys)
+        manifest = {} if full else _manifest_hashes(dataset, keys)
+        hashes = dict(zip(keys, chunk_hashes))
+        changed_mask = [full or manifest.get(key) != row_hash for key, row_hash in zip(keys, chunk_hashes)]
+        instances = {row[key_column]: build_instance(row) for row in chunk[changed_mask].to_dict('records')}
+        if not instances:
+            continue
+
+        # Rows missing from the manifest may still exist, so check the table
+        # rather than assume an insert.
+        existing = _existing_keys(model, instances)
+        if not adopt_untracked:
+            collisions = sorted(key for key in instances if key in existing and key not in manifest)
+            if collisions:
+                logger.warning(
+                    f"Skipping {len(collisions)} {dataset} rows whose key already exists but was not "
+                    f"loaded from a file (run with --full to take them over): {collisions[:20]}"
+                )
+                for key in collisions:
+                    del instances[key]
+        to_create = [instance for key, instance in instances.items() if key not in existing]
+        to_update = [instance for key, instance in instances.items() if key in existing]
+        model.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+        model.objects.bulk_update(to_update, update_fields, batch_size=BATCH_SIZE)
+        IngestedRow.objects.bulk_create(
+            [IngestedRow(dataset=dataset, key=key, row_hash=hashes[key]) for key in instances],
+            update_conflicts=True,
+            unique_fields=['dataset', 'key'],
+            update_fields=['row_hash'],
+            batch_size=BATCH_SIZE
+        )
+        created += len(to_create)
+        updated += len(to_update)
+
+    removed = [
+        key for key in IngestedRow.objects.filter(dataset=dataset).values_list('key', flat=True).iterator()
+        if key not in seen
+    ]
+    for batch in _batches(removed):
+        model.objects.filter(pk__in=batch).delete()
+        IngestedRow.objects.filter(dataset=dataset, key__in=batch).delete()
+    return {'created': created, 'updated': updated, 'deleted': len(removed)}
+
+
+def _file_unchanged(dataset, digest):
+    return IngestedFile.objects.filter(dataset=dataset, file_hash=digest).exists()
+
+
+def _record_file(dataset, digest):
+    IngestedFile.objects.update_or_create(dataset=dataset, defaults={'file_hash': digest})
+
+
+def ingest_customers(path, full=False, file_format=None):
+    """
+    Applies the changes in the customer file. Returns a summary dict.
+    """
+    digest = file_hash(path)
+    if not full and _file_unchanged('customers', digest):
+        return {'skipped': True}
+
+    import pandas as pd
+
+    # We need to handle 'Age' as it may not be in the file, but it is in the model
+    # We'll fill any missing 'Age' with None (which becomes NULL in the DB)
+    chunks = read_chunks(path, CUSTOMER_COLUMNS, file_format, optional=('Age',))
+
+    def build_customer(row):
+        return Customer(
+            customer_id=row['Customer ID'],
+            first_name=row['First Name'],
+            last_name=row['Last Name'],
+            age=row['Age'] if pd.notnull(row['Age']) else None,
+            phone_number=row['Phone Number'],
+            monthly_salary=Decimal(str(row['Monthly Salary'])),
+            approved_limit=Decimal(str(row['Approved Limit'])),
+            current_debt=0  # Set initial debt to 0
+        )
+
+    with transaction.atomic():
+        summary = _apply_delta(
+            'customers', Customer, chunks, 'Customer ID',
+            build_customer, CUSTOMER_UPDATE_FIELDS, full
+        )
+        _record_file('customers', digest)
+    return {'skipped': False, **summary}
+
+
+def _usable_loan_chunks(chunks):
+    """
+    Drops repeated Loan IDs (the first occurrence wins, as in the source
+    data) and loans whose customer does not exist.
+    """
+    seen = set()
+    # Only create a loan if its customer_id actually exists in our DB
+    customer_ids = set(Customer.objects.values_list('customer_id', flat=True))
+    duplicate_count = 0
+    for chunk in chunks:
+        duplicates = chunk['Loan ID'].duplicated() | chunk['Loan ID'].isin(seen)
+        duplicate_count += int(duplicates.sum())
+        chunk = chunk[~duplicates]
+        seen.update(chunk['Loan ID'].tolist())
+
+        known_customer = chunk['Customer ID'].isin(customer_ids)
+        for row in chunk[~known_customer].to_dict('records'):
+            logger.warning(f"Skipping loan {row['Loan ID']}: Customer {row['Customer ID']} not found.")
+        yield chunk[known_customer]
+
+    if duplicate_count:
+        logger.warning(f"Ignoring {duplicate_count} loan rows with a repeated Loan ID.")
+
+
+def ingest_loans(path, full=False, customers_changed=True, file_format=None):
+    """
+    Applies the changes in the loan file. Returns a summary dict.
+    An unchanged file is only skipped when the customers did not change
+    either, since loans skipped for a missing customer may now apply.
+    """
+    digest = file_hash(path)
+    if not full and not customers_changed and _file_unchanged('loans', digest):
+        return {'skipped': True}
+
+    chunks = _usable_loan_chunks(
+        read_chunks(path, LOAN_COLUMNS, file_format, date_columns=LOAN_DATE_COLUMNS)
+    )
+
+    def build_loan(row):
+        return Loan(
+            customer_id=row['Customer ID'],
+            loan_id=row['Loan ID'],
+            loan_amount=Decimal(str(row['Loan Amount'])),
+            tenure=row['Tenure'],
+            interest_rate=Decimal(str(row['Interest Rate'])),
+            monthly_repayment=Decimal(str(row['Monthly payment'])),
+            emis_paid_on_time=row['EMIs paid on Time'],
+            start_date=row['Date of Approval'],
+            end_date=row['End Date']
+        )
+
+    with transaction.atomic():
+        summary = _apply_delta(
+            'loans', Loan, chunks, 'Loan ID',
+            build_loan, LOAN_UPDATE_FIELDS, full
+        )
+        _record_file('loans', digest)
+    return {'skipped': False, **summary}
@@ -1,11 +1,35 @@
 from django.core.management.base import BaseCommand
+from api.ingestion import FORMATS
 from api.tasks import ingest_data_task
 
 class Command(BaseCommand):
-    help = 'Ingests customer and loan data from Excel files into the database via a Celery task.'
+    help = 'Ingests customer and loan data (Excel, CSV, Parquet or Arrow files) into the database via a Celery task.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--customers', default='customer_data.xlsx',
+            help='Customer data file, as seen by the worker (default: customer_data.xlsx).'
+        )
+        parser.add_argument(
+            '--loans', default='loan_data.xlsx',
+            help='Loan data file, as seen by the worker (default: loan_data.xlsx).'
+        )
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Format of both files. By default it is taken from each file extension.'
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Re-apply every row, even if the files have not changed since the last run.'
+        )
 
     def handle(self, *args, **kwargs):
         self.stdout.write(self.style.SUCCESS('Dispatching data ingestion task to Celery...'))
         # .delay() is how you send a task to the Celery queue
-        ingest_data_task.delay()
-        self.stdout.write(self.style.SUCCESS('Task has been sent to the worker. Check worker logs for progress.'))
\ No newline at end of file
+        ingest_data_task.delay(
+            full=kwargs['full'],
+            customers_path=kwargs['customers'],
+            loans_path=kwargs['loans'],
+            file_format=kwargs['format']
+        )
+        self.stdout.write(self.style.SUCCESS('Task has been sent to the worker. Check worker logs for progress.'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from api.models import Customer
+from api.tasks import score_customers_task
+from core.db_router import use_replica
+
+class Command(BaseCommand):
+    help = 'Computes credit scores in batches on the scoring workers via Celery tasks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'customer_ids', nargs='*', type=int,
+            help='Customers to score (default: every customer).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Customers per task (default: 500).'
+        )
+        parser.add_argument(
+            '--wait', action='store_true',
+            help='Wait for the scores and print them. Needs CELERY_RESULT_BACKEND.'
+        )
+
+    def handle(self, *args, **options):
+        customer_ids = options['customer_ids']
+        if not customer_ids:
+            with use_replica():
+                customer_ids = list(Customer.objects.order_by('customer_id').values_list('customer_id', flat=True))
+
+        batch_size = options['batch_size']
+        results = [
+            score_customers_task.delay(customer_ids[start:start + batch_size])
+            for start in range(0, len(customer_ids), batch_size)
+        ]
+        self.stdout.write(self.style.SUCCESS(
+            f'Dispatched {len(results)} scoring tasks for {len(customer_ids)} customers.'
+        ))
+
+        if options['wait']:
+            for result in results:
+                for customer_id, score in result.get().items():
+                    self.stdout.write(f'{customer_id}: {score}')
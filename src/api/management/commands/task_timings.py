@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from core.celery import app
+from core import task_metrics
+
+class Command(BaseCommand):
+    help = 'Shows run counts and timings for Celery tasks, as recorded by the workers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Clear the recorded timings after printing them.')
+
+    def handle(self, *args, **options):
+        task_names = sorted(name for name in app.tasks if not name.startswith('celery.'))
+        timings = task_metrics.get_task_timings(task_names)
+        if not timings:
+            self.stdout.write('No task timings recorded yet.')
+        for task_name, stats in timings.items():
+            self.stdout.write(
+                f"{task_name}: runs={stats['count']} failures={stats['failures']} "
+                f"avg={stats['avg_ms']}ms last={stats['last_ms']}ms total={stats['total_ms']}ms"
+            )
+        if options['reset']:
+            task_metrics.reset_task_timings(task_names)
+            self.stdout.write(self.style.SUCCESS('Task timings cleared.'))
@@ -0,0 +1,107 @@
+from datetime import date
+from django.conf import settings
+from django.db import migrations, models
+
+
+def _capture_indexes_and_foreign_keys(cursor, table):
+    # Non-primary indexes and FK constraints, so they can be recreated under
+    # the same names once the table has been rebuilt.
+    cursor.execute(
+        "SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i "
+        "WHERE i.indrelid = %s::regclass AND NOT i.indisprimary "
+        "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)",
+        [table]
+    )
+    indexes = [row[0].replace(' ON ONLY ', ' ON ') for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [table]
+    )
+    foreign_keys = cursor.fetchall()
+    return indexes, foreign_keys
+
+
+def _restore_indexes_and_foreign_keys(cursor, table, indexes, foreign_keys):
+    for index_sql in indexes:
+        cursor.execute(index_sql)
+    for name, definition in foreign_keys:
+        cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}')
+
+
+def partition_loans(apps, schema_editor):
+    """
+    Rebuilds api_loan as a table range-partitioned by end_date: one partition
+    per year covering the existing data and LOAN_PARTITION_YEARS_AHEAD years
+    ahead, plus a DEFAULT partition. PostgreSQL only.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        indexes, foreign_keys = _capture_indexes_and_foreign_keys(cursor, 'api_loan')
+
+        cursor.execute("ALTER TABLE api_loan RENAME TO api_loan_unpartitioned")
+        cursor.execute(
+            "CREATE TABLE api_loan (LIKE api_loan_unpartitioned INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (end_date)"
+        )
+        cursor.execute("CREATE TABLE api_loan_default PARTITION OF api_loan DEFAULT")
+
+        this_year = date.today().year
+        cursor.execute(
+            "SELECT EXTRACT(YEAR FROM MIN(end_date))::int, EXTRACT(YEAR FROM MAX(end_date))::int "
+            "FROM api_loan_unpartitioned"
+        )
+        first_year, last_year = cursor.fetchone()
+        first_year = min(first_year or this_year, this_year)
+        last_year = max(last_year or this_year, this_year + settings.LOAN_PARTITION_YEARS_AHEAD)
+        for year in range(first_year, last_year + 1):
+            cursor.execute(
+                f"CREATE TABLE api_loan_y{year} PARTITION OF api_loan "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [date(year, 1, 1), date(year + 1, 1, 1)]
+            )
+
+        cursor.execute("INSERT INTO api_loan SELECT * FROM api_loan_unpartitioned")
+        cursor.execute("DROP TABLE api_loan_unpartitioned")
+
+        # A unique constraint on a partitioned table must include the
+        # partition key, so the database only enforces (loan_id, end_date):
+        # the same loan_id could be stored twice with different end dates.
+        # The write paths keep loan_id unique instead: create-loan takes new
+        # IDs from services.allocate_loan_ids, and ingestion looks every
+        # Loan ID up across all partitions and updates that row in place.
+        cursor.execute("ALTER TABLE api_loan ADD CONSTRAINT api_loan_pkey PRIMARY KEY (loan_id, end_date)")
+        _restore_indexes_and_foreign_keys(cursor, 'api_loan', indexes, foreign_keys)
+
+
+def unpartition_loans(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        indexes, foreign_keys = _capture_indexes_and_foreign_keys(cursor, 'api_loan')
+
+        cursor.execute("CREATE TABLE api_loan_unpartitioned (LIKE api_loan INCLUDING DEFAULTS)")
+        cursor.execute("INSERT INTO api_loan_unpartitioned SELECT * FROM api_loan")
+        cursor.execute("DROP TABLE api_loan CASCADE")
+        cursor.execute("ALTER TABLE api_loan_unpartitioned RENAME TO api_loan")
+
+        cursor.execute("ALTER TABLE api_loan ADD CONSTRAINT api_loan_pkey PRIMARY KEY (loan_id)")
+        _restore_indexes_and_foreign_keys(cursor, 'api_loan', indexes, foreign_keys)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_alter_customer_customer_id_alter_loan_loan_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loan',
+            index=models.Index(fields=['customer', 'end_date'], name='api_loan_cust_end_idx'),
+        ),
+        migrations.RunPython(partition_loans, unpartition_loans),
+    ]
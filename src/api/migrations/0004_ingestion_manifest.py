@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_partition_loan_by_end_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestedFile',
+            fields=[
+                ('dataset', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('file_hash', models.CharField(max_length=64)),
+                ('ingested_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='IngestedRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dataset', models.CharField(max_length=32)),
+                ('key', models.BigIntegerField()),
+                ('row_hash', models.BigIntegerField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('dataset', 'key'), name='api_ingestedrow_dataset_key')],
+            },
+        ),
+    ]
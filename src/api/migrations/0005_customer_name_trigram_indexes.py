@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+# Admin search runs icontains on names, which Django renders on PostgreSQL
+# as UPPER("first_name"::text) LIKE UPPER('%term%'). Trigram GIN indexes on
+# that same expression let such searches use an index. PostgreSQL only.
+NAME_COLUMNS = ('first_name', 'last_name')
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column in NAME_COLUMNS:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS api_customer_{column}_trgm "
+            f"ON api_customer USING gin (UPPER({column}::text) gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in NAME_COLUMNS:
+        schema_editor.execute(f"DROP INDEX IF EXISTS api_customer_{column}_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_ingestion_manifest'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
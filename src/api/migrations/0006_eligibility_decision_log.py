@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_customer_name_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EligibilityDecision',
+            fields=[
+                ('decision_id', models.UUIDField(primary_key=True, serialize=False)),
+                ('decided_at', models.DateTimeField()),
+                ('customer_id', models.IntegerField()),
+                ('loan_amount', models.BigIntegerField()),
+                ('interest_rate', models.IntegerField()),
+                ('tenure', models.IntegerField()),
+                ('monthly_salary', models.BigIntegerField(null=True)),
+                ('current_debt', models.BigIntegerField(null=True)),
+                ('credit_score', models.IntegerField(null=True)),
+                ('score_components', models.JSONField(default=dict)),
+                ('approval', models.BooleanField()),
+                ('reason', models.CharField(max_length=32)),
+                ('corrected_interest_rate', models.IntegerField(null=True)),
+                ('monthly_installment', models.BigIntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['customer_id', 'decided_at'], name='api_decision_cust_time_idx'), models.Index(fields=['decided_at'], name='api_decision_time_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+def add_future_partition(apps, schema_editor):
+    """
+    Adds api_loan_future (see api/partitioning.py) so queries on recent
+    end dates can skip the DEFAULT partition, and gives past years found in
+    DEFAULT their own partitions. PostgreSQL only.
+    """
+    from api import partitioning
+
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    partitioning.ensure_loan_partitions(using=schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_eligibility_decision_log'),
+    ]
+
+    operations = [
+        # Reversing 0003 copies every partition back into a plain table,
+        # so there is nothing to undo here.
+        migrations.RunPython(add_future_partition, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_loan_future_partition'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='eligibilitydecision',
+            name='api_decision_cust_time_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='eligibilitydecision',
+            name='api_decision_time_idx',
+        ),
+        migrations.AlterField(
+            model_name='eligibilitydecision',
+            name='reason',
+            field=models.CharField(choices=[('approved', 'Approved'), ('low_credit_score', 'Credit score too low'), ('emi_over_half_salary', 'EMIs over half of salary'), ('customer_not_found', 'Customer not found')], max_length=32),
+        ),
+        migrations.AddIndex(
+            model_name='eligibilitydecision',
+            index=models.Index(fields=['customer_id', 'decided_at', 'decision_id'], name='api_decision_cust_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eligibilitydecision',
+            index=models.Index(fields=['decided_at', 'decision_id'], name='api_decision_time_idx'),
+        ),
+    ]
@@ -25,5 +25,84 @@ class Loan(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
 
+    class Meta:
+        # On PostgreSQL the table is range-partitioned by end_date
+        # (see migration 0003 and api/partitioning.py).
+        indexes = [
+            models.Index(fields=['customer', 'end_date'], name='api_loan_cust_end_idx'),
+        ]
+
+    def __str__(self):
+        return f"Loan {self.loan_id} for Customer {self.customer_id}"
+
+class IngestedFile(models.Model):
+    """
+    Fingerprint of the last workbook loaded for each dataset ('customers', 'loans').
+    """
+    dataset = models.CharField(max_length=32, primary_key=True)
+    file_hash = models.CharField(max_length=64)
+    ingested_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.dataset} ({self.file_hash[:12]})"
+
+class IngestedRow(models.Model):
+    """
+    Content hash of every row loaded from a workbook, keyed by its ID, so the
+    next run only applies rows that were added, changed or removed.
+    """
+    dataset = models.CharField(max_length=32)
+    key = models.BigIntegerField()
+    row_hash = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['dataset', 'key'], name='api_ingestedrow_dataset_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.dataset} row {self.key}"
+
+class EligibilityDecision(models.Model):
+    """
+    Audit record of one check_loan_eligibility decision: its inputs, the
+    credit score components behind it and the outcome. Written in batches
+    by api.decision_log, never on the request path.
+    """
+    REASON_CHOICES = [
+        ('approved', 'Approved'),
+        ('low_credit_score', 'Credit score too low'),
+        ('emi_over_half_salary', 'EMIs over half of salary'),
+        ('customer_not_found', 'Customer not found'),
+    ]
+
+    # Generated when the decision is made, so a redelivered flush task
+    # cannot store the same decision twice.
+    decision_id = models.UUIDField(primary_key=True)
+    decided_at = models.DateTimeField()
+    # Not a foreign key: the log must outlive (and not lock) customer rows.
+    customer_id = models.IntegerField()
+    # Amounts in paise and rates in basis points, as passed to the services layer
+    loan_amount = models.BigIntegerField()
+    interest_rate = models.IntegerField()
+    tenure = models.IntegerField()
+    monthly_salary = models.BigIntegerField(null=True)
+    current_debt = models.BigIntegerField(null=True)
+    credit_score = models.IntegerField(null=True)
+    score_components = models.JSONField(default=dict)
+    approval = models.BooleanField()
+    reason = models.CharField(max_length=32, choices=REASON_CHOICES)
+    corrected_interest_rate = models.IntegerField(null=True)
+    monthly_installment = models.BigIntegerField()
+
+    class Meta:
+        # decision_id breaks ties between decisions made in the same
+        # microsecond, so pages (see DecisionLogView) follow the index order.
+        indexes = [
+            models.Index(fields=['customer_id', 'decided_at', 'decision_id'], name='api_decision_cust_time_idx'),
+            models.Index(fields=['decided_at', 'decision_id'], name='api_decision_time_idx'),
+        ]
+
     def __str__(self):
-        return f"Loan {self.loan_id} for Customer {self.customer.customer_id}"
\ No newline at end of file
+        outcome = 'approved' if self.approval else 'rejected'
+        return f"Customer {self.customer_id} {outcome} at {self.decided_at:%Y-%m-%d %H:%M:%S}"
@@ -0,0 +1,53 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+# Money inside the scoring/EMI engine is held as integer paise (1/100 rupee)
+# and interest rates as integer basis points (1/100 percent). Both match the
+# two decimal places used by the model and serializer fields, so converting
+# a validated Decimal is exact and happens once, at the serializer/ORM edge.
+SCALE = 100
+_CENT = Decimal('0.01')
+
+
+def _to_hundredths(value) -> int:
+    if isinstance(value, int):
+        return value * SCALE
+    if not isinstance(value, Decimal):
+        # Floats go through str() so 10.1 becomes 1010, not 1009.
+        value = Decimal(str(value))
+    return int((value * SCALE).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def to_paise(amount) -> int:
+    """
+    Converts a rupee amount (Decimal, int or float) to integer paise.
+    """
+    return _to_hundredths(amount)
+
+
+def from_paise(paise: int) -> Decimal:
+    """
+    Converts integer paise back to a two-place rupee Decimal.
+    """
+    return (Decimal(paise) / SCALE).quantize(_CENT)
+
+
+def to_basis_points(rate) -> int:
+    """
+    Converts an annual percentage rate (e.g. Decimal('10.50')) to basis points.
+    """
+    return _to_hundredths(rate)
+
+
+def from_basis_points(bps: int) -> Decimal:
+    """
+    Converts basis points back to a two-place percentage Decimal.
+    """
+    return (Decimal(bps) / SCALE).quantize(_CENT)
+
+
+def div_round_half_up(numerator: int, denominator: int) -> int:
+    """
+    Integer division rounded half away from zero, for positive denominators.
+    """
+    quotient = (abs(numerator) * 2 + denominator) // (denominator * 2)
+    return quotient if numerator >= 0 else -quotient
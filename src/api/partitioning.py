@@ -0,0 +1,185 @@
+from datetime import date
+from django.conf import settings
+from django.db import connections, transaction
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# api_loan is range-partitioned by end_date on PostgreSQL, one partition per
+# calendar year, plus:
+#   - api_loan_future, from the year after the last yearly partition up to
+#     MAXVALUE, so the ranges above any date are fully covered and a query
+#     on end_date > today never has to scan the DEFAULT partition;
+#   - a DEFAULT partition, which only catches loans older than the first
+#     yearly partition (e.g. history loaded after migrating an empty table)
+#     until ensure_loan_partitions gives their years partitions of their own.
+# Active loans (end_date > today) live in the current and future years, so
+# the hot set stays in a handful of small partitions while historical loans
+# sit in older, rarely touched ones.
+LOAN_TABLE = 'api_loan'
+LOAN_DEFAULT_PARTITION = 'api_loan_default'
+LOAN_FUTURE_PARTITION = 'api_loan_future'
+_YEARLY_PARTITION = re.compile(rf'^{LOAN_TABLE}_y(\d{{4}})$')
+_RANGE_START = re.compile(r"FROM \('(\d{4})-01-01'\)")
+
+
+def loan_partition_name(year: int) -> str:
+    return f"{LOAN_TABLE}_y{year}"
+
+
+def loan_partition_bounds(year: int):
+    """
+    Returns the [start, end) end_date range covered by a yearly partition.
+    """
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def is_partitioned(using='default') -> bool:
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [LOAN_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def existing_loan_partitions(using='default'):
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND pg_table_is_visible(p.oid)",
+            [LOAN_TABLE]
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def _create_partition(cursor, name, start, end=None):
+    """
+    Creates a partition for end_date in [start, end), or [start, MAXVALUE)
+    when `end` is None. Loans in that range that already landed in the
+    DEFAULT partition are moved into it, since PostgreSQL refuses to attach
+    a range the DEFAULT partition still holds rows for. Returns the number
+    of loans moved.
+    """
+    in_range = "end_date >= %s" + (" AND end_date < %s" if end else "")
+    bounds = [start, end] if end else [start]
+    cursor.execute(f"CREATE TEMP TABLE api_loan_spill (LIKE {LOAN_DEFAULT_PARTITION})")
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {LOAN_DEFAULT_PARTITION} WHERE {in_range} RETURNING *) "
+        f"INSERT INTO api_loan_spill SELECT * FROM moved",
+        bounds
+    )
+    cursor.execute(
+        f"CREATE TABLE {name} PARTITION OF {LOAN_TABLE} "
+        f"FOR VALUES FROM (%s) TO ({'%s' if end else 'MAXVALUE'})",
+        bounds
+    )
+    cursor.execute(f"INSERT INTO {LOAN_TABLE} SELECT * FROM api_loan_spill")
+    moved = cursor.rowcount
+    cursor.execute("DROP TABLE api_loan_spill")
+    if moved:
+        logger.info(f"Moved {moved} loans from {LOAN_DEFAULT_PARTITION} into {name}.")
+    return moved
+
+
+def create_loan_partition(year: int, using='default'):
+    """
+    Creates the partition for one year, moving that year's loans out of the
+    DEFAULT partition. The year must not be covered by api_loan_future;
+    use ensure_loan_partitions, which handles that.
+    """
+    name = loan_partition_name(year)
+    start, end = loan_partition_bounds(year)
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        _create_partition(cursor, name, start, end)
+    return name
+
+
+def _default_partition_years(cursor):
+    cursor.execute(f"SELECT DISTINCT EXTRACT(YEAR FROM end_date)::int FROM {LOAN_DEFAULT_PARTITION}")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def _future_partition_start(cursor):
+    cursor.execute(
+        "SELECT pg_get_expr(c.relpartbound, c.oid) FROM pg_class c "
+        "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+        [LOAN_FUTURE_PARTITION]
+    )
+    row = cursor.fetchone()
+    return int(_RANGE_START.search(row[0]).group(1)) if row else None
+
+
+def plan_loan_partitions(existing_years, default_years, this_year, through_year):
+    """
+    Returns (missing_years, future_start): the yearly partitions to create
+    and the first year api_loan_future should cover.
+
+    Every year from `this_year` to `through_year` gets a partition, and so
+    does every earlier year that has loans sitting in the DEFAULT partition.
+    """
+    wanted = set(range(this_year, through_year + 1))
+    wanted |= {year for year in default_years if year <= through_year}
+    missing = sorted(wanted - set(existing_years))
+    future_start = max(set(existing_years) | wanted) + 1
+    return missing, future_start
+
+
+def ensure_loan_partitions(through_year=None, using='default'):
+    """
+    Makes sure yearly partitions exist from the current year up to
+    `through_year` (default: LOAN_PARTITION_YEARS_AHEAD years from now) and
+    for every past year with loans in the DEFAULT partition, moving those
+    loans into them. api_loan_future is then (re)bounded to start right
+    after the last yearly partition.
+    Returns the names of the partitions that were created.
+    No-op when the database is not PostgreSQL or the table is not partitioned.
+    """
+    if not is_partitioned(using):
+        return []
+
+    this_year = date.today().year
+    if through_year is None:
+        through_year = this_year + settings.LOAN_PARTITION_YEARS_AHEAD
+
+    existing = existing_loan_partitions(using)
+    existing_years = {
+        int(match.group(1)) for match in map(_YEARLY_PARTITION.match, existing) if match
+    }
+    created = []
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        missing, future_start = plan_loan_partitions(
+            existing_years, _default_partition_years(cursor), this_year, through_year
+        )
+        current_start = _future_partition_start(cursor)
+        if current_start is not None and current_start < future_start:
+            # The new yearly ranges overlap api_loan_future: detach it, carve
+            # the years out, then attach it again above them.
+            cursor.execute(f"ALTER TABLE {LOAN_TABLE} DETACH PARTITION {LOAN_FUTURE_PARTITION}")
+
+        for year in missing:
+            start, end = loan_partition_bounds(year)
+            _create_partition(cursor, loan_partition_name(year), start, end)
+            created.append(loan_partition_name(year))
+
+        bound = date(future_start, 1, 1)
+        if current_start is None:
+            _create_partition(cursor, LOAN_FUTURE_PARTITION, bound)
+            created.append(LOAN_FUTURE_PARTITION)
+        elif current_start < future_start:
+            # Rows below the new bound are routed into the new yearly partitions.
+            cursor.execute(f"INSERT INTO {LOAN_TABLE} SELECT * FROM {LOAN_FUTURE_PARTITION} WHERE end_date < %s", [bound])
+            cursor.execute(f"DELETE FROM {LOAN_FUTURE_PARTITION} WHERE end_date < %s", [bound])
+            cursor.execute(
+                f"ALTER TABLE {LOAN_TABLE} ATTACH PARTITION {LOAN_FUTURE_PARTITION} "
+                f"FOR VALUES FROM (%s) TO (MAXVALUE)",
+                [bound]
+            )
+    return created
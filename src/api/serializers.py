@@ -1,8 +1,26 @@
 from rest_framework import serializers
-from .models import Customer, Loan
+from .models import Customer, Loan, EligibilityDecision
+from . import money
 from datetime import date
 from dateutil.relativedelta import relativedelta
 
+# Longest loan accepted, in months (50 years).
+MAX_TENURE_MONTHS = 600
+
+
+class FixedPointField(serializers.DecimalField):
+    """
+    A two-decimal amount on the wire, integer hundredths (paise for money,
+    basis points for rates) inside the services layer.
+    Output is rendered as a float to keep the existing response format.
+    """
+    def to_internal_value(self, data):
+        return money.to_paise(super().to_internal_value(data))
+
+    def to_representation(self, value):
+        return float(money.from_paise(value))
+
+
 class CustomerRegistrationSerializer(serializers.ModelSerializer):
     monthly_income = serializers.DecimalField(max_digits=10, decimal_places=2, source='monthly_salary', write_only=True)
     class Meta:
@@ -27,23 +45,23 @@ class CustomerResponseSerializer(serializers.ModelSerializer):
 
 class LoanEligibilityRequestSerializer(serializers.Serializer):
     customer_id = serializers.IntegerField()
-    loan_amount = serializers.DecimalField(max_digits=10, decimal_places=2)
-    interest_rate = serializers.DecimalField(max_digits=5, decimal_places=2)
-    tenure = serializers.IntegerField()
+    loan_amount = FixedPointField(max_digits=10, decimal_places=2)
+    interest_rate = FixedPointField(max_digits=5, decimal_places=2)
+    tenure = serializers.IntegerField(min_value=0, max_value=MAX_TENURE_MONTHS)
 
 class LoanEligibilityResponseSerializer(serializers.Serializer):
     customer_id = serializers.IntegerField()
     approval = serializers.BooleanField()
-    interest_rate = serializers.FloatField()
-    corrected_interest_rate = serializers.FloatField(allow_null=True)
+    interest_rate = FixedPointField(max_digits=5, decimal_places=2)
+    corrected_interest_rate = FixedPointField(max_digits=5, decimal_places=2, allow_null=True)
     tenure = serializers.IntegerField()
-    monthly_installment = serializers.FloatField()
+    monthly_installment = FixedPointField(max_digits=10, decimal_places=2)
 
 class CreateLoanRequestSerializer(serializers.Serializer):
     customer_id = serializers.IntegerField()
-    loan_amount = serializers.DecimalField(max_digits=10, decimal_places=2)
-    interest_rate = serializers.DecimalField(max_digits=5, decimal_places=2)
-    tenure = serializers.IntegerField()
+    loan_amount = FixedPointField(max_digits=10, decimal_places=2)
+    interest_rate = FixedPointField(max_digits=5, decimal_places=2)
+    tenure = serializers.IntegerField(min_value=0, max_value=MAX_TENURE_MONTHS)
 
 
 class CreateLoanResponseSerializer(serializers.Serializer):
@@ -51,7 +69,7 @@ class CreateLoanResponseSerializer(serializers.Serializer):
     customer_id = serializers.IntegerField()
     loan_approved = serializers.BooleanField()
     message = serializers.CharField()
-    monthly_installment = serializers.FloatField(allow_null=True)
+    monthly_installment = FixedPointField(max_digits=10, decimal_places=2, allow_null=True)
 
 class CustomerDetailSerializer(serializers.ModelSerializer):
     class Meta:
@@ -92,4 +110,38 @@ class ViewLoansByCustomerSerializer(serializers.ModelSerializer):
         elif months_left > 0 and today.day < end_date.day:
             months_left += 1
 
-        return max(0, months_left)
\ No newline at end of file
+        return max(0, months_left)
+
+
+class DecisionLogQuerySerializer(serializers.Serializer):
+    customer_id = serializers.IntegerField(required=False)
+    approval = serializers.BooleanField(required=False, allow_null=True, default=None)
+    reason = serializers.ChoiceField(choices=EligibilityDecision.REASON_CHOICES, required=False)
+    since = serializers.DateTimeField(required=False)
+    # Exclusive keyset cursor: pass the decided_at and decision_id of the
+    # last decision of a page to get the next one.
+    before = serializers.DateTimeField(required=False)
+    before_id = serializers.UUIDField(required=False)
+    limit = serializers.IntegerField(required=False, default=100, min_value=1, max_value=1000)
+
+    def validate(self, data):
+        if 'before_id' in data and 'before' not in data:
+            raise serializers.ValidationError({'before_id': 'Only valid together with before.'})
+        return data
+
+
+class EligibilityDecisionSerializer(serializers.ModelSerializer):
+    loan_amount = FixedPointField(max_digits=12, decimal_places=2)
+    interest_rate = FixedPointField(max_digits=5, decimal_places=2)
+    monthly_salary = FixedPointField(max_digits=12, decimal_places=2, allow_null=True)
+    current_debt = FixedPointField(max_digits=12, decimal_places=2, allow_null=True)
+    corrected_interest_rate = FixedPointField(max_digits=5, decimal_places=2, allow_null=True)
+    monthly_installment = FixedPointField(max_digits=12, decimal_places=2)
+
+    class Meta:
+        model = EligibilityDecision
+        fields = (
+            'decision_id', 'decided_at', 'customer_id', 'loan_amount', 'interest_rate', 'tenure',
+            'monthly_salary', 'current_debt', 'credit_score', 'score_components',
+            'approval', 'reason', 'corrected_interest_rate', 'monthly_installment'
+        )
@@ -1,8 +1,10 @@
 from decimal import Decimal, ROUND_HALF_UP
-from django.db.models import Sum
+from django.db import connection
+from django.db.models import Count, Max, Sum
 from .models import Customer, Loan
+from . import decision_log, money
+from core import db_router
 from datetime import date
-import math
 
 def calculate_approved_limit(monthly_salary: Decimal) -> Decimal:
     """
@@ -18,6 +20,54 @@ def calculate_approved_limit(monthly_salary: Decimal) -> Decimal:
     rounded_limit = (unrounded_limit / 100000).to_integral_value(rounding=ROUND_HALF_UP) * 100000
     return rounded_limit
 
+def calculate_approved_limits(monthly_salaries) -> list:
+    """
+    Batch version of calculate_approved_limit for bulk registration.
+    Works on integer paise in a single pass, avoiding a Decimal division
+    per row; results are identical to the single-row function.
+    """
+    # 1 lakh = 100,000 rupees = 10,000,000 paise
+    lakh_paise = 100000 * money.SCALE
+    return [
+        Decimal(money.div_round_half_up(36 * money.to_paise(salary), lakh_paise) * 100000)
+        for salary in monthly_salaries
+    ]
+
+# Arbitrary key for the PostgreSQL advisory lock guarding customer IDs
+CUSTOMER_ID_LOCK = 7100
+
+def allocate_customer_ids(count: int) -> range:
+    """
+    Reserves a contiguous block of `count` customer IDs after the current maximum.
+    Must be called inside transaction.atomic(): on PostgreSQL a transaction-level
+    advisory lock keeps concurrent registrations from getting the same IDs
+    until the new rows are committed.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [CUSTOMER_ID_LOCK])
+    max_id = Customer.objects.aggregate(max_id=Max('customer_id'))['max_id'] or 0
+    return range(max_id + 1, max_id + 1 + count)
+
+# Arbitrary key for the PostgreSQL advisory lock guarding loan IDs
+LOAN_ID_LOCK = 7101
+
+def allocate_loan_ids(count: int) -> range:
+    """
+    Reserves a contiguous block of `count` loan IDs after the current maximum,
+    under the same locking rules as allocate_customer_ids.
+
+    On PostgreSQL the partitioned api_loan table can only enforce
+    (loan_id, end_date) as its primary key, so loan_id itself is not unique
+    in the database. Taking new IDs above every existing loan, in all
+    partitions, is what keeps them unique.
+    """
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [LOAN_ID_LOCK])
+    max_id = Loan.objects.aggregate(max_id=Max('loan_id'))['max_id'] or 0
+    return range(max_id + 1, max_id + 1 + count)
+
 def get_customer_loans(customer_id: int):
     """
     Fetches a customer and their current outstanding debt.
@@ -35,21 +85,51 @@ def get_customer_loans(customer_id: int):
     )
     
     current_debt = current_debt_agg['total_debt'] or Decimal('0.00')
-    customer.current_debt = current_debt
-    customer.save()
+    # Only write when the cached value changed, so read-only callers
+    # don't hit the primary (or get pinned to it) on every request. A value
+    # computed from a replica may be stale, so it is used but never stored.
+    if customer.current_debt != current_debt:
+        customer.current_debt = current_debt
+        if not db_router.reading_from_replica():
+            customer.save(update_fields=['current_debt'])
     
     return customer, current_debt
 
-def calculate_credit_score(customer: Customer) -> int:
+def current_debts(customer_ids) -> dict:
     """
-    Calculates a credit score based on a customer's loan history.
+    Batch version of the current debt in get_customer_loans: one grouped
+    query over the active loans of many customers. Returns
+    {customer_id: total monthly repayment}; customers without active loans
+    are left out.
+    """
+    rows = (
+        Loan.objects.filter(customer_id__in=customer_ids, end_date__gt=date.today())
+        .values('customer_id')
+        .annotate(total_debt=Sum('monthly_repayment'))
+        .order_by()
+    )
+    return {row['customer_id']: row['total_debt'] for row in rows}
+
+def credit_score_components(customer: Customer) -> dict:
+    """
+    Returns the points each rule of the credit score awards, plus whether
+    the knock-out rule applies. See calculate_credit_score.
     """
+    # Queries filter on end_date so PostgreSQL can prune api_loan partitions.
+    today = date.today()
+
     # 1. Past Loans paid on time
-    # Ratio of total EMIs paid on time vs. total tenure of past loans
-    past_loans = customer.loans.filter(end_date__lte=date.today())
-    if past_loans.exists():
-        total_emis_paid = past_loans.aggregate(total=Sum('emis_paid_on_time'))['total'] or 0
-        total_tenure = past_loans.aggregate(total=Sum('tenure'))['total'] or 0
+    # Ratio of total EMIs paid on time vs. total tenure of past loans.
+    # Past loans live in the cold partitions, so read them in a single pass.
+    past_loans = customer.loans.filter(end_date__lte=today).aggregate(
+        count=Count('loan_id'),
+        total_emis_paid=Sum('emis_paid_on_time'),
+        total_tenure=Sum('tenure')
+    )
+    num_past_loans = past_loans['count']
+    if num_past_loans:
+        total_emis_paid = past_loans['total_emis_paid'] or 0
+        total_tenure = past_loans['total_tenure'] or 0
         if total_tenure > 0:
             payment_ratio = total_emis_paid / total_tenure
             score_a = int(payment_ratio * 30) # Max 30 points
@@ -59,7 +139,6 @@ def calculate_credit_score(customer: Customer) -> int:
         score_a = 30 # No past loans? Good start.
     
     # 2. Number of loans taken in the past
-    num_past_loans = past_loans.count()
     if num_past_loans > 5:
         score_b = 20 # Experienced borrower
     elif 2 <= num_past_loans <= 5:
@@ -68,7 +147,12 @@ def calculate_credit_score(customer: Customer) -> int:
         score_b = 0 # Max 20 points
         
     # 3. Loan activity in current year
-    current_year_loans = customer.loans.filter(start_date__year=date.today().year).count()
+    # A loan started this year cannot end before January 1st, which lets
+    # the planner skip every partition of earlier years.
+    current_year_loans = customer.loans.filter(
+        start_date__year=today.year,
+        end_date__gte=date(today.year, 1, 1)
+    ).count()
     if current_year_loans > 2:
         score_c = 0 # Too many recent loans is risky
     else:
@@ -82,99 +166,158 @@ def calculate_credit_score(customer: Customer) -> int:
     else:
         score_d = 35 # Max 35 points
 
-    # --- Knock-out Rule ---
-    # If sum of current active loans > approved limit, score is 0
-    if customer.current_debt > customer.approved_limit:
-        return 0
+    return {
+        'past_loans_paid_on_time': score_a,
+        'number_of_past_loans': score_b,
+        'current_year_activity': score_c,
+        'approved_limit_vs_loans': score_d,
+        # --- Knock-out Rule ---
+        # If sum of current active loans > approved limit, score is 0
+        'debt_over_limit': customer.current_debt > customer.approved_limit,
+    }
 
-    total_score = score_a + score_b + score_c + score_d
+def credit_score_from_components(components: dict) -> int:
+    if components['debt_over_limit']:
+        return 0
+    total_score = (
+        components['past_loans_paid_on_time'] + components['number_of_past_loans']
+        + components['current_year_activity'] + components['approved_limit_vs_loans']
+    )
     return min(total_score, 100) # Cap at 100
 
-def calculate_monthly_installment(principal, annual_rate, tenure_months):
+def calculate_credit_score(customer: Customer) -> int:
+    """
+    Calculates a credit score based on a customer's loan history.
+    """
+    return credit_score_from_components(credit_score_components(customer))
+
+# Fixed-point scale of the EMI growth factor (1+r)^n: 18 decimal places keep
+# the rounding error far below a paisa for any accepted tenure.
+GROWTH_SCALE = 10 ** 18
+
+def calculate_monthly_installment_paise(principal_paise: int, annual_rate_bps: int, tenure_months: int) -> int:
     """
-    Calculates EMI using the formula:
+    Calculates EMI in integer paise using the formula:
     EMI = P * r * (1+r)^n / ((1+r)^n - 1)
+
+    (1+r)^n is computed by repeated squaring in fixed point, as an integer
+    scaled by GROWTH_SCALE, so the cost grows with log(n) and the operands
+    stay a few words wide. The result is rounded half-up to paise only at
+    the end.
     """
     if tenure_months == 0:
-        return principal
-    r = float(annual_rate / 100 / 12)
-    if r == 0:
-        return principal / tenure_months
-        
-    P = float(principal)
-    n = float(tenure_months)
-    emi = P * r * (pow(1 + r, n)) / (pow(1 + r, n) - 1)
-    return round(emi, 2)
+        return principal_paise
+    if annual_rate_bps == 0:
+        return money.div_round_half_up(principal_paise, tenure_months)
+
+    # r = bps / (12 months * 100 percent * 100 basis points), scaled
+    rate = money.div_round_half_up(annual_rate_bps * GROWTH_SCALE, 12 * 100 * 100)
+    growth = _fixed_point_power(GROWTH_SCALE + rate, tenure_months)
+    return money.div_round_half_up(principal_paise * rate * growth, GROWTH_SCALE * (growth - GROWTH_SCALE))
+
+
+def _fixed_point_power(base: int, exponent: int) -> int:
+    """
+    Raises a positive GROWTH_SCALE fixed-point number to a non-negative
+    integer power, rounding each product half-up.
+    """
+    half = GROWTH_SCALE // 2
+    result = GROWTH_SCALE
+    while exponent:
+        if exponent & 1:
+            result = (result * base + half) // GROWTH_SCALE
+        exponent >>= 1
+        if exponent:
+            base = (base * base + half) // GROWTH_SCALE
+    return result
+
 
+def calculate_monthly_installment(principal, annual_rate, tenure_months):
+    """
+    Calculates EMI in rupees, rounded to 2 decimal places.
+    Kept for callers outside the scoring engine; it wraps the paise version.
+    """
+    emi_paise = calculate_monthly_installment_paise(
+        money.to_paise(principal), money.to_basis_points(annual_rate), tenure_months
+    )
+    return float(money.from_paise(emi_paise))
 
-def check_loan_eligibility(customer_id, loan_amount, interest_rate, tenure):
+
+def check_loan_eligibility(customer_id, loan_amount_paise, interest_rate_bps, tenure):
     """
     Checks if a customer is eligible for a new loan based on their credit score
     and current debt.
+
+    Amounts are integer paise and rates integer basis points, both in the
+    arguments and in the returned dict; the serializers convert at the edge.
+    Every decision is added to the audit log (api.decision_log), which is
+    written in the background.
+    """
+    result, audit = _decide_loan_eligibility(customer_id, loan_amount_paise, interest_rate_bps, tenure)
+    decision_log.record(customer_id, loan_amount_paise, interest_rate_bps, tenure, result, **audit)
+    return result
+
+
+def _decide_loan_eligibility(customer_id, loan_amount_paise, interest_rate_bps, tenure):
+    """
+    Returns (result, audit): the eligibility result and the extra details
+    the decision log keeps about it (reason, score components, salary, debt).
     """
     customer, current_debt = get_customer_loans(customer_id)
     if not customer:
-        return {'approval': False, 'message': 'Customer not found'}
+        return {'approval': False, 'message': 'Customer not found'}, {'reason': 'customer_not_found'}
+
+    components = credit_score_components(customer)
+    credit_score = credit_score_from_components(components)
+    audit = {
+        'credit_score': credit_score,
+        'score_components': components,
+        'monthly_salary': money.to_paise(customer.monthly_salary),
+        'current_debt': money.to_paise(current_debt),
+    }
+
+    rejection = {
+        'customer_id': customer_id,
+        'approval': False,
+        'interest_rate': interest_rate_bps,
+        'corrected_interest_rate': None,
+        'tenure': tenure,
+        'monthly_installment': 0
+    }
 
-    credit_score = calculate_credit_score(customer)
-    
-    # Convert inputs to Decimal for calculations
-    loan_amount = Decimal(str(loan_amount))
-    interest_rate = Decimal(str(interest_rate))
-    
     # Rule 1: Credit Score > 50
     if credit_score < 50:
-        return {
-            'customer_id': customer_id,
-            'approval': False,
-            'interest_rate': float(interest_rate),
-            'corrected_interest_rate': None,
-            'tenure': tenure,
-            'monthly_installment': 0.0
-        }
-    
+        return rejection, {**audit, 'reason': 'low_credit_score'}
+
     # Rule 2: Check if new EMI is affordable
-    new_monthly_installment = calculate_monthly_installment(loan_amount, interest_rate, tenure)
-    total_monthly_debt = current_debt + Decimal(str(new_monthly_installment))
-    
-    if total_monthly_debt > (customer.monthly_salary * Decimal('0.5')):
-        return {
-            'customer_id': customer_id,
-            'approval': False,
-            'interest_rate': float(interest_rate),
-            'corrected_interest_rate': None,
-            'tenure': tenure,
-            'monthly_installment': 0.0
-        }
+    new_monthly_installment = calculate_monthly_installment_paise(loan_amount_paise, interest_rate_bps, tenure)
+    total_monthly_debt = audit['current_debt'] + new_monthly_installment
+
+    # total > salary * 0.5, kept in integers
+    if total_monthly_debt * 2 > audit['monthly_salary']:
+        return rejection, {**audit, 'reason': 'emi_over_half_salary'}
 
     # Rule 3: Adjust interest rate based on score
-    corrected_interest_rate = interest_rate
+    corrected_interest_rate = interest_rate_bps
     if credit_score > 50:
         # Eligible
         pass # Use provided interest rate
     elif 30 < credit_score <= 50:
-        corrected_interest_rate = max(interest_rate, Decimal('12.0'))
+        corrected_interest_rate = max(interest_rate_bps, 1200)
     elif 10 < credit_score <= 30:
-        corrected_interest_rate = max(interest_rate, Decimal('16.0'))
+        corrected_interest_rate = max(interest_rate_bps, 1600)
     else: # Score < 10
-        return {
-            'customer_id': customer_id,
-            'approval': False,
-            'interest_rate': float(interest_rate),
-            'corrected_interest_rate': None,
-            'tenure': tenure,
-            'monthly_installment': 0.0
-        }
-    
+        return rejection, {**audit, 'reason': 'low_credit_score'}
+
     # Recalculate EMI if interest rate was corrected
-    if corrected_interest_rate != interest_rate:
-        new_monthly_installment = calculate_monthly_installment(loan_amount, corrected_interest_rate, tenure)
-    
+    if corrected_interest_rate != interest_rate_bps:
+        new_monthly_installment = calculate_monthly_installment_paise(loan_amount_paise, corrected_interest_rate, tenure)
+
     return {
         'customer_id': customer_id,
         'approval': True,
-        'interest_rate': float(interest_rate),
-        'corrected_interest_rate': float(corrected_interest_rate),
+        'interest_rate': interest_rate_bps,
+        'corrected_interest_rate': corrected_interest_rate,
         'tenure': tenure,
-        'monthly_installment': float(new_monthly_installment)
-    }
\ No newline at end of file
+        'monthly_installment': new_monthly_installment
+    }, {**audit, 'reason': 'approved'}
@@ -1,80 +1,99 @@
-import pandas as pd
 from celery import shared_task
-from .models import Customer, Loan
-import logging
+from celery.exceptions import SoftTimeLimitExceeded
+from .models import Customer
+from . import decision_log, ingestion, partitioning, services
+from core.db_router import use_replica
 from decimal import Decimal
+import logging
 
 # Set up a logger to see output from the worker
 logger = logging.getLogger(__name__)
 
-@shared_task
-def ingest_data_task():
+# A lost worker here is almost always the ingest itself running out of memory,
+# so don't requeue it (acks_late would otherwise redeliver it forever).
+@shared_task(reject_on_worker_lost=False)
+def ingest_data_task(full=False, customers_path='customer_data.xlsx', loans_path='loan_data.xlsx', file_format=None):
+    """
+    Loads the customer and loan files incrementally: unchanged files are
+    skipped and only added, changed or removed rows are written. Pass
+    full=True to re-apply every row. file_format is one of
+    ingestion.FORMATS, or None to go by each file's extension.
+    """
     try:
         # --- Ingest Customer Data ---
         logger.info("Starting customer data ingestion...")
-        # We specify 'openpyxl' as the engine to read .xlsx files
-        customer_df = pd.read_excel('customer_data.xlsx', engine='openpyxl')
-        
-        # We need to handle 'Age' as it's not in the file, but it is in the model
-        # We'll fill any missing 'Age' with None (which becomes NULL in the DB)
-        if 'Age' not in customer_df.columns:
-            customer_df['Age'] = None
-
-        customers_to_create = []
-        for _, row in customer_df.iterrows():
-            customers_to_create.append(
-                Customer(
-                    customer_id=row['Customer ID'],
-                    first_name=row['First Name'],
-                    last_name=row['Last Name'],
-                    age=row['Age'] if pd.notnull(row['Age']) else None,
-                    phone_number=row['Phone Number'],
-                    monthly_salary=Decimal(str(row['Monthly Salary'])),
-                    approved_limit=Decimal(str(row['Approved Limit'])),
-                    current_debt=0  # Set initial debt to 0
-                )
+        customers = ingestion.ingest_customers(customers_path, full=full, file_format=file_format)
+        if customers['skipped']:
+            logger.info(f"{customers_path} is unchanged since the last run; skipping.")
+        else:
+            logger.info(
+                f"Successfully ingested customer records: {customers['created']} created, "
+                f"{customers['updated']} updated, {customers['deleted']} deleted."
             )
-        
-        # bulk_create is much faster than creating one by one
-        # ignore_conflicts=True will skip any rows that have a Customer ID
-        # that already exists, preventing crashes.
-        Customer.objects.bulk_create(customers_to_create, ignore_conflicts=True)
-        logger.info(f"Successfully ingested {len(customers_to_create)} customer records.")
 
         # --- Ingest Loan Data ---
         logger.info("Starting loan data ingestion...")
-        loan_df = pd.read_excel('loan_data.xlsx', engine='openpyxl')
-        
-        # Get a set of all valid customer IDs from the database
-        # This is fast and efficient
-        customer_ids = set(Customer.objects.values_list('customer_id', flat=True))
-        
-        loans_to_create = []
-        for _, row in loan_df.iterrows():
-            # Only create a loan if its customer_id actually exists in our DB
-            if row['Customer ID'] in customer_ids:
-                loans_to_create.append(
-                    Loan(
-                        customer_id=row['Customer ID'],
-                        loan_id=row['Loan ID'],
-                        loan_amount=Decimal(str(row['Loan Amount'])),
-                        tenure=row['Tenure'],
-                        interest_rate=Decimal(str(row['Interest Rate'])),
-                        monthly_repayment=Decimal(str(row['Monthly payment'])),
-                        emis_paid_on_time=row['EMIs paid on Time'],
-                        start_date=row['Date of Approval'],
-                        end_date=row['End Date']
-                    )
-                )
-            else:
-                logger.warning(f"Skipping loan {row['Loan ID']}: Customer {row['Customer ID']} not found.")
-        
-        Loan.objects.bulk_create(loans_to_create, ignore_conflicts=True)
-        logger.info(f"Successfully ingested {len(loans_to_create)} loan records.")
+        loans = ingestion.ingest_loans(
+            loans_path, full=full, customers_changed=not customers['skipped'], file_format=file_format
+        )
+        if loans['skipped']:
+            logger.info(f"{loans_path} is unchanged since the last run; skipping.")
+        else:
+            logger.info(
+                f"Successfully ingested loan records: {loans['created']} created, "
+                f"{loans['updated']} updated, {loans['deleted']} deleted."
+            )
+            # History older than the existing partitions lands in the DEFAULT
+            # partition; give those years partitions of their own.
+            created = partitioning.ensure_loan_partitions()
+            if created:
+                logger.info(f"Created loan partitions: {', '.join(created)}")
 
+    except SoftTimeLimitExceeded:
+        # Let the task end as failed rather than be reported as a success.
+        logger.error("Data ingestion hit its soft time limit.")
+        raise
     except FileNotFoundError as e:
-        logger.error(f"Data ingestion failed: File not found - {e}. Make sure 'customer_data.xlsx' and 'loan_data.xlsx' are in the 'src/' directory.")
+        logger.error(f"Data ingestion failed: File not found - {e}. Make sure '{customers_path}' and '{loans_path}' exist (relative paths are resolved from the 'src/' directory).")
     except Exception as e:
         logger.error(f"An unexpected error occurred during data ingestion: {e}")
 
-    return "Data ingestion process completed."
\ No newline at end of file
+    return "Data ingestion process completed."
+
+@shared_task
+def score_customers_task(customer_ids):
+    """
+    Computes credit scores for a batch of customers, reading from a replica
+    when one is configured. Returns {customer_id: score}.
+    Dispatched in batches by `python manage.py score_customers`.
+    """
+    with use_replica():
+        debts = services.current_debts(customer_ids)
+        scores = {}
+        for customer in Customer.objects.filter(customer_id__in=customer_ids):
+            # Score on the live debt, as check_loan_eligibility does, not the
+            # cached column. It comes from the replica, so it is not saved.
+            customer.current_debt = debts.get(customer.customer_id, Decimal('0.00'))
+            scores[customer.customer_id] = services.calculate_credit_score(customer)
+        return scores
+
+
+@shared_task
+def maintain_loan_partitions_task():
+    """
+    Runs daily from Celery beat. Creates the yearly api_loan partitions that
+    are coming into range (moving api_loan_future's lower bound up) and
+    moves any loans that fell into the DEFAULT partition into their year.
+    """
+    created = partitioning.ensure_loan_partitions()
+    if created:
+        logger.info(f"Created loan partitions: {', '.join(created)}")
+    return created
+
+
+@shared_task
+def flush_decision_log_task(entries):
+    """
+    Stores a batch of eligibility decisions buffered by api.decision_log.
+    """
+    return decision_log.write_decisions(entries)
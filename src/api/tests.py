@@ -1,5 +1,28 @@
-from django.test import TestCase
-from . import services
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.contrib.auth.models import User
+from django.utils import timezone
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from core import db_router, task_metrics
+from .tasks import score_customers_task, flush_decision_log_task, ingest_data_task
+from celery.exceptions import SoftTimeLimitExceeded
+from . import ingestion
+from django.conf import settings
+from pathlib import Path
+import pandas as pd
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from . import services, money, partitioning, decision_log
+from .models import Customer, Loan, EligibilityDecision
+from unittest import mock, skipUnless
+from datetime import date
+from io import StringIO
 from decimal import Decimal
 
 class ServiceFunctionTests(TestCase):
@@ -23,6 +46,16 @@ class ServiceFunctionTests(TestCase):
         expected_limit3 = Decimal('2000000')  # 36 * 55000 = 1,980,000 -> rounds up
         self.assertEqual(services.calculate_approved_limit(salary3), expected_limit3)
         
+    def test_calculate_approved_limits_matches_single_row(self):
+        """
+        The batch computation gives the same limits as calculate_approved_limit.
+        """
+        salaries = [Decimal('50000'), Decimal('51000'), Decimal('55000'), Decimal('1388.89'), Decimal('0'), Decimal('99999999.99')]
+        self.assertEqual(
+            services.calculate_approved_limits(salaries),
+            [services.calculate_approved_limit(salary) for salary in salaries]
+        )
+
     def test_calculate_monthly_installment(self):
         """
         Test the EMI calculation.
@@ -33,4 +66,843 @@ class ServiceFunctionTests(TestCase):
         tenure_months = 12
         # Using a standard EMI calculator, 100k @ 10% for 12mo = 8791.59
         expected_emi = 8791.59
-        self.assertAlmostEqual(services.calculate_monthly_installment(principal, annual_rate, tenure_months), expected_emi, places=2)
\ No newline at end of file
+        self.assertAlmostEqual(services.calculate_monthly_installment(principal, annual_rate, tenure_months), expected_emi, places=2)
+
+    def test_monthly_installment_paise_matches_float_formula(self):
+        """
+        The integer-paise EMI should agree with the original float formula.
+        """
+        def float_emi(principal, annual_rate, tenure_months):
+            r = float(annual_rate / 100 / 12)
+            P = float(principal)
+            n = float(tenure_months)
+            return round(P * r * (pow(1 + r, n)) / (pow(1 + r, n) - 1), 2)
+
+        for principal in (Decimal('1000'), Decimal('100000'), Decimal('987654.32')):
+            for annual_rate in (Decimal('0.50'), Decimal('8.20'), Decimal('10.5'), Decimal('16.32')):
+                for tenure_months in (1, 12, 129, 360, 600):
+                    emi_paise = services.calculate_monthly_installment_paise(
+                        money.to_paise(principal), money.to_basis_points(annual_rate), tenure_months
+                    )
+                    expected = float_emi(principal, annual_rate, tenure_months)
+                    self.assertAlmostEqual(emi_paise / 100, expected, delta=0.01)
+
+    def test_monthly_installment_paise_edge_cases(self):
+        """
+        Zero tenure returns the principal; zero rate splits it evenly.
+        """
+        self.assertEqual(services.calculate_monthly_installment_paise(100000, 1000, 0), 100000)
+        self.assertEqual(services.calculate_monthly_installment_paise(100000, 0, 3), 33333)
+        self.assertEqual(services.calculate_monthly_installment_paise(100001, 0, 2), 50001)
+
+    def test_money_conversions(self):
+        """
+        Conversions to and from integer paise are exact for two-place values.
+        """
+        self.assertEqual(money.to_paise(Decimal('8791.59')), 879159)
+        self.assertEqual(money.to_paise(10.1), 1010)
+        self.assertEqual(money.to_paise(250), 25000)
+        self.assertEqual(money.from_paise(879159), Decimal('8791.59'))
+        self.assertEqual(money.to_basis_points(Decimal('10.5')), 1050)
+        self.assertEqual(money.from_basis_points(1600), Decimal('16.00'))
+
+
+class EligibilityAPITests(TestCase):
+
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            customer_id=1, first_name='Test', last_name='User', age=25,
+            phone_number=9876543210, monthly_salary=Decimal('60000'),
+            approved_limit=Decimal('2200000')
+        )
+
+    def test_check_eligibility_response_format(self):
+        """
+        Amounts go in and come out as rupee floats, even though the service
+        works in paise and basis points.
+        """
+        response = self.client.post('/api/check-eligibility/', {
+            'customer_id': 1, 'loan_amount': 100000, 'interest_rate': 10.5, 'tenure': 12
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            'customer_id': 1,
+            'approval': True,
+            'interest_rate': 10.5,
+            'corrected_interest_rate': 10.5,
+            'tenure': 12,
+            'monthly_installment': 8814.86,
+        })
+
+    def test_tenure_must_be_within_bounds(self):
+        for url in ('/api/check-eligibility/', '/api/create-loan/'):
+            for tenure in (-1, 601):
+                response = self.client.post(url, {
+                    'customer_id': 1, 'loan_amount': 100000, 'interest_rate': 10.5, 'tenure': tenure
+                }, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('tenure', response.json())
+
+        response = self.client.post('/api/check-eligibility/', {
+            'customer_id': 1, 'loan_amount': 10000, 'interest_rate': 10.5, 'tenure': 0
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['monthly_installment'], 10000.0)
+
+    def test_create_loan_stores_rupee_decimals(self):
+        """
+        The created loan is persisted with two-place Decimal amounts.
+        """
+        Loan.objects.create(
+            customer=self.customer, loan_id=10, loan_amount=Decimal('1000'), tenure=1,
+            interest_rate=Decimal('5'), monthly_repayment=Decimal('1000'), emis_paid_on_time=1,
+            start_date=date(2020, 1, 1), end_date=date(2020, 2, 1)
+        )
+        response = self.client.post('/api/create-loan/', {
+            'customer_id': 1, 'loan_amount': 100000, 'interest_rate': 10.5, 'tenure': 12
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['monthly_installment'], 8814.86)
+        # New loan IDs are allocated after the highest existing one
+        self.assertEqual(response.json()['loan_id'], 11)
+
+        loan = Loan.objects.get(customer=self.customer, tenure=12)
+        self.assertEqual(loan.loan_amount, Decimal('100000.00'))
+        self.assertEqual(loan.interest_rate, Decimal('10.50'))
+        self.assertEqual(loan.monthly_repayment, Decimal('8814.86'))
+
+
+class CreditScoreTests(TestCase):
+
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            customer_id=1, first_name='Test', last_name='User', age=25,
+            phone_number=9876543210, monthly_salary=Decimal('60000'),
+            approved_limit=Decimal('2200000')
+        )
+
+    def add_loan(self, loan_id, start_date, end_date, tenure, emis_paid_on_time):
+        Loan.objects.create(
+            customer=self.customer, loan_id=loan_id, loan_amount=Decimal('10000'), tenure=tenure,
+            interest_rate=Decimal('10'), monthly_repayment=Decimal('1000'),
+            emis_paid_on_time=emis_paid_on_time, start_date=start_date, end_date=end_date
+        )
+
+    def test_no_loans(self):
+        """
+        A customer with no history gets full marks except the loan-count component.
+        """
+        self.assertEqual(services.calculate_credit_score(self.customer), 30 + 0 + 15 + 35)
+
+    def test_past_loans_scored_from_single_aggregate(self):
+        """
+        Past loans drive the on-time ratio and the loan-count component.
+        """
+        self.add_loan(1, date(2015, 1, 1), date(2016, 1, 1), tenure=12, emis_paid_on_time=12)
+        self.add_loan(2, date(2016, 1, 1), date(2017, 1, 1), tenure=12, emis_paid_on_time=6)
+        # 18 of 24 EMIs on time -> int(0.75 * 30) = 22; two past loans -> 10
+        self.assertEqual(services.calculate_credit_score(self.customer), 22 + 10 + 15 + 35)
+
+
+class PartitioningTests(TestCase):
+
+    def test_partition_bounds(self):
+        """
+        Each yearly partition covers [Jan 1st, next Jan 1st).
+        """
+        self.assertEqual(partitioning.loan_partition_name(2024), 'api_loan_y2024')
+        self.assertEqual(partitioning.loan_partition_bounds(2024), (date(2024, 1, 1), date(2025, 1, 1)))
+        # Partitioning is PostgreSQL-only; elsewhere maintenance is a no-op.
+        self.assertEqual(partitioning.ensure_loan_partitions(), [])
+
+    def test_plan_covers_history_in_default_partition(self):
+        """
+        Migrating an empty table and then ingesting history leaves past years
+        in DEFAULT; they get partitions and the future range starts above
+        the last yearly partition.
+        """
+        missing, future_start = partitioning.plan_loan_partitions(
+            existing_years=range(2026, 2032), default_years={2010, 2015, 2025},
+            this_year=2026, through_year=2031
+        )
+        self.assertEqual(missing, [2010, 2015, 2025])
+        self.assertEqual(future_start, 2032)
+
+    def test_plan_moves_future_partition_up(self):
+        missing, future_start = partitioning.plan_loan_partitions(
+            existing_years=range(2026, 2032), default_years=set(), this_year=2027, through_year=2032
+        )
+        self.assertEqual(missing, [2032])
+        self.assertEqual(future_start, 2033)
+
+        # Yearly partitions created past through_year (from existing data) are kept
+        missing, future_start = partitioning.plan_loan_partitions(
+            existing_years=range(2010, 2038), default_years=set(), this_year=2026, through_year=2031
+        )
+        self.assertEqual(missing, [])
+        self.assertEqual(future_start, 2038)
+
+
+@skipUnless(connection.vendor == 'postgresql', "api_loan is only partitioned on PostgreSQL")
+class PostgresPartitioningTests(TransactionTestCase):
+    """
+    Runs the partitioning migration and maintenance on a real PostgreSQL
+    database (see "Running the Tests" in the README).
+    """
+
+    def tearDown(self):
+        # Leave the schema fully migrated, even if the test stopped halfway.
+        call_command('migrate', 'api', verbosity=0)
+
+    def create_loan(self, loan_id, end_date):
+        return Loan.objects.create(
+            customer_id=1, loan_id=loan_id, loan_amount=Decimal('1000'), tenure=12,
+            interest_rate=Decimal('10'), monthly_repayment=Decimal('100'), emis_paid_on_time=0,
+            start_date=date(1990, 1, 1), end_date=end_date
+        )
+
+    def partition_of(self, loan_id):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT tableoid::regclass::text FROM api_loan WHERE loan_id = %s", [loan_id])
+            return cursor.fetchone()[0]
+
+    def test_migrate_load_and_maintain_partitions(self):
+        this_year = date.today().year
+        last_year = this_year + settings.LOAN_PARTITION_YEARS_AHEAD
+
+        # Existing data is carried over when the table gets partitioned
+        call_command('migrate', 'api', '0002', verbosity=0)
+        self.assertFalse(partitioning.is_partitioned())
+        Customer.objects.create(
+            customer_id=1, first_name='A', last_name='B', phone_number=1,
+            monthly_salary=Decimal('50000'), approved_limit=Decimal('1800000')
+        )
+        self.create_loan(1, date(2015, 6, 1))
+        self.create_loan(2, date(this_year + 1, 3, 1))
+        call_command('migrate', 'api', verbosity=0)
+
+        self.assertTrue(partitioning.is_partitioned())
+        partitions = partitioning.existing_loan_partitions()
+        for year in range(2015, last_year + 1):
+            self.assertIn(partitioning.loan_partition_name(year), partitions)
+        self.assertEqual(self.partition_of(1), 'api_loan_y2015')
+        self.assertEqual(self.partition_of(2), partitioning.loan_partition_name(this_year + 1))
+
+        # Loads land in DEFAULT below the first year and in api_loan_future above the last
+        self.create_loan(3, date(1999, 1, 1))
+        self.create_loan(4, date(2100, 1, 1))
+        self.assertEqual(self.partition_of(3), partitioning.LOAN_DEFAULT_PARTITION)
+        self.assertEqual(self.partition_of(4), partitioning.LOAN_FUTURE_PARTITION)
+
+        created = partitioning.ensure_loan_partitions(through_year=last_year + 2)
+        self.assertEqual(created, [
+            'api_loan_y1999', partitioning.loan_partition_name(last_year + 1),
+            partitioning.loan_partition_name(last_year + 2),
+        ])
+        self.assertEqual(self.partition_of(3), 'api_loan_y1999')
+        self.assertEqual(self.partition_of(4), partitioning.LOAN_FUTURE_PARTITION)
+        self.assertEqual(partitioning.ensure_loan_partitions(through_year=last_year + 2), [])
+        self.assertEqual(Loan.objects.count(), 4)
+
+        # The database only enforces (loan_id, end_date); new IDs come after every partition's loans
+        with transaction.atomic():
+            self.assertEqual(list(services.allocate_loan_ids(2)), [5, 6])
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'])
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = db_router.PrimaryReplicaRouter()
+
+    def test_reads_use_primary_unless_opted_in(self):
+        self.assertEqual(self.router.db_for_read(Loan), 'default')
+        with db_router.use_replica():
+            self.assertEqual(self.router.db_for_read(Loan), 'replica_1')
+        self.assertEqual(self.router.db_for_read(Loan), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas_configured(self):
+        with db_router.use_replica():
+            self.assertEqual(self.router.db_for_read(Loan), 'default')
+
+    def test_reads_after_a_write_use_primary(self):
+        """
+        Read-your-writes within a single request or task.
+        """
+        with db_router.use_replica():
+            self.assertEqual(self.router.db_for_write(Loan), 'default')
+            self.assertEqual(self.router.db_for_read(Loan), 'default')
+
+    def test_middleware_routes_opted_in_views_and_pins_after_writes(self):
+        class ReadView:
+            read_replica = True
+
+        def view_func(request):
+            pass
+        view_func.view_class = ReadView
+
+        def run(request, write=False):
+            routed = {}
+
+            def get_response(request):
+                middleware.process_view(request, view_func, (), {})
+                routed['read'] = self.router.db_for_read(Loan)
+                if write:
+                    self.router.db_for_write(Loan)
+                return HttpResponse()
+            middleware = db_router.ReplicaRoutingMiddleware(get_response)
+            return middleware(request), routed['read']
+
+        factory = RequestFactory()
+        response, read_db = run(factory.get('/api/view-loans/1/'))
+        self.assertEqual(read_db, 'replica_1')
+        self.assertNotIn(db_router.PIN_COOKIE, response.cookies)
+
+        response, read_db = run(factory.post('/api/register/'), write=True)
+        self.assertIn(db_router.PIN_COOKIE, response.cookies)
+
+        pinned_request = factory.get('/api/view-loans/1/')
+        pinned_request.COOKIES[db_router.PIN_COOKIE] = '1'
+        response, read_db = run(pinned_request)
+        self.assertEqual(read_db, 'default')
+
+
+@override_settings(
+    DATABASE_REPLICAS=['replica_1'],
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'pins'}}
+)
+class ReplicaPinningTests(TestCase):
+    """
+    Read-your-writes for clients that don't send the pin cookie back.
+    """
+
+    def setUp(self):
+        self.addCleanup(db_router.cache.clear)
+
+    def test_written_customer_is_pinned_without_cookies(self):
+        response = self.client.post('/api/register/', {
+            'first_name': 'Test', 'last_name': 'User', 'age': 25,
+            'monthly_income': 60000, 'phone_number': 9876543210
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        customer_id = response.json()['customer_id']
+        self.assertTrue(db_router.is_pinned_to_primary(customer_id=customer_id))
+        self.assertFalse(db_router.is_pinned_to_primary(customer_id=customer_id + 1))
+
+        middleware = db_router.ReplicaRoutingMiddleware(lambda request: HttpResponse())
+        view_func = lambda request: None
+        view_func.view_class = type('ReadView', (), {'read_replica': True})
+        routed = {}
+        for pinned_id in (customer_id, customer_id + 1):
+            def get_response(request, pinned_id=pinned_id):
+                middleware.process_view(request, view_func, (), {'customer_id': pinned_id})
+                # (db_for_read itself stays on the primary inside TestCase's transaction)
+                routed[pinned_id] = db_router.reading_from_replica()
+                return HttpResponse()
+            middleware.get_response = get_response
+            middleware(RequestFactory().get(f'/api/view-loans/{pinned_id}/'))
+        self.assertEqual(routed, {customer_id: False, customer_id + 1: True})
+
+    def test_debt_read_from_replica_is_not_saved(self):
+        customer = Customer.objects.create(
+            customer_id=1, first_name='Test', last_name='User', phone_number=9876543210,
+            monthly_salary=Decimal('60000'), approved_limit=Decimal('2200000'),
+            current_debt=Decimal('500')
+        )
+        with db_router.use_replica():
+            # The replica mirrors the primary in tests, so reads still work.
+            loaded, current_debt = services.get_customer_loans(1)
+        self.assertEqual(current_debt, Decimal('0.00'))
+        self.assertEqual(loaded.current_debt, Decimal('0.00'))
+        customer.refresh_from_db()
+        self.assertEqual(customer.current_debt, Decimal('500'))
+
+        services.get_customer_loans(1)
+        customer.refresh_from_db()
+        self.assertEqual(customer.current_debt, Decimal('0'))
+
+
+class BulkRegisterTests(TestCase):
+
+    def test_bulk_register_reports_per_row_results(self):
+        """
+        Valid rows get a contiguous ID block after the current maximum;
+        invalid rows are returned with their errors.
+        """
+        Customer.objects.create(
+            customer_id=41, first_name='Existing', last_name='User',
+            phone_number=1, monthly_salary=Decimal('1000'), approved_limit=Decimal('0')
+        )
+        payload = [
+            {'first_name': 'A', 'last_name': 'One', 'age': 30, 'monthly_income': 50000, 'phone_number': 9000000001},
+            {'first_name': 'B', 'last_name': 'Two', 'monthly_income': 'lots', 'phone_number': 9000000002},
+            {'first_name': 'C', 'last_name': 'Three', 'monthly_income': 55000, 'phone_number': 9000000003},
+        ]
+        response = self.client.post('/api/register/bulk/', payload, content_type='application/json')
+        self.assertEqual(response.status_code, 207)
+
+        results = response.json()['results']
+        self.assertEqual([r['status'] for r in results], ['created', 'error', 'created'])
+        self.assertIn('monthly_income', results[1]['errors'])
+        self.assertEqual(results[0]['customer']['customer_id'], 42)
+        self.assertEqual(results[2]['customer']['customer_id'], 43)
+        self.assertEqual(results[2]['customer']['approved_limit'], '2000000.00')
+        self.assertEqual(Customer.objects.count(), 3)
+
+    def test_bulk_register_reports_limit_overflow_per_row(self):
+        """
+        An income whose approved limit doesn't fit the column fails only its row.
+        """
+        payload = [
+            {'first_name': 'A', 'last_name': 'One', 'monthly_income': 50000, 'phone_number': 9000000001},
+            {'first_name': 'B', 'last_name': 'Two', 'monthly_income': 5000000, 'phone_number': 9000000002},
+        ]
+        response = self.client.post('/api/register/bulk/', payload, content_type='application/json')
+        self.assertEqual(response.status_code, 207)
+
+        results = response.json()['results']
+        self.assertEqual([r['status'] for r in results], ['created', 'error'])
+        self.assertIn('monthly_income', results[1]['errors'])
+        self.assertEqual(Customer.objects.count(), 1)
+
+    def test_bulk_register_rejects_non_list(self):
+        response = self.client.post('/api/register/bulk/', {'first_name': 'A'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class TaskTests(TestCase):
+
+    def test_score_customers_task_records_timing(self):
+        """
+        Batch scoring returns one score per customer, and the run shows up
+        in the task timing metrics.
+        """
+        Customer.objects.create(
+            customer_id=1, first_name='Test', last_name='User',
+            phone_number=1, monthly_salary=Decimal('60000'), approved_limit=Decimal('2200000')
+        )
+        task_name = score_customers_task.name
+        task_metrics.reset_task_timings([task_name])
+
+        result = score_customers_task.apply(args=[[1, 2]]).get()
+        self.assertEqual(result, {1: 80})
+
+        timings = task_metrics.get_task_timings([task_name])
+        self.assertEqual(timings[task_name]['count'], 1)
+        self.assertEqual(timings[task_name]['failures'], 0)
+
+    def test_score_customers_task_uses_active_debt(self):
+        """
+        The knock-out rule sees the debt of active loans, not the cached
+        current_debt column, and nothing is written back.
+        """
+        for customer_id, cached_debt in ((1, Decimal('0')), (2, Decimal('900000'))):
+            Customer.objects.create(
+                customer_id=customer_id, first_name='Test', last_name='User', phone_number=customer_id,
+                monthly_salary=Decimal('10000'), approved_limit=Decimal('100000'), current_debt=cached_debt
+            )
+        # Customer 1 owes more per month than their limit; customer 2's loan has ended.
+        for loan_id, customer_id, end_date in ((1, 1, date(2099, 1, 1)), (2, 2, date(2020, 1, 1))):
+            Loan.objects.create(
+                customer_id=customer_id, loan_id=loan_id, loan_amount=Decimal('50000'), tenure=12,
+                interest_rate=Decimal('10'), monthly_repayment=Decimal('150000'), emis_paid_on_time=12,
+                start_date=date(2019, 1, 1), end_date=end_date
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            result = score_customers_task.apply(args=[[1, 2]]).get()
+        self.assertEqual(result[1], 0)
+        self.assertGreater(result[2], 0)
+        self.assertFalse([q for q in queries.captured_queries if q['sql'].startswith('UPDATE')])
+        self.assertEqual(Customer.objects.get(pk=1).current_debt, Decimal('0'))
+
+    def test_score_customers_command_dispatches_batches(self):
+        for customer_id in range(1, 6):
+            Customer.objects.create(
+                customer_id=customer_id, first_name='Test', last_name='User', phone_number=customer_id,
+                monthly_salary=Decimal('10000'), approved_limit=Decimal('100000')
+            )
+        with mock.patch.object(score_customers_task, 'delay') as delay:
+            call_command('score_customers', '--batch-size', '2', stdout=StringIO())
+        self.assertEqual([call.args[0] for call in delay.call_args_list], [[1, 2], [3, 4], [5]])
+
+    def test_ingest_timeout_is_a_failure(self):
+        """
+        A soft time limit isn't swallowed by the task's error handling.
+        """
+        task_name = ingest_data_task.name
+        task_metrics.reset_task_timings([task_name])
+        with mock.patch.object(ingestion, 'ingest_customers', side_effect=SoftTimeLimitExceeded()):
+            result = ingest_data_task.apply()
+        self.assertEqual(result.state, 'FAILURE')
+        self.assertEqual(task_metrics.get_task_timings([task_name])[task_name]['failures'], 1)
+
+    def test_ingest_is_not_redelivered_forever(self):
+        self.assertFalse(ingest_data_task.reject_on_worker_lost)
+        self.assertGreater(
+            settings.CELERY_BROKER_TRANSPORT_OPTIONS['visibility_timeout'],
+            settings.CELERY_TASK_ANNOTATIONS[ingest_data_task.name]['time_limit']
+        )
+
+
+class DeltaIngestionTests(TestCase):
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.customers_path = self.tmp / 'customer_data.xlsx'
+        self.loans_path = self.tmp / 'loan_data.xlsx'
+        shutil.copy(settings.BASE_DIR / 'customer_data.xlsx', self.customers_path)
+        shutil.copy(settings.BASE_DIR / 'loan_data.xlsx', self.loans_path)
+
+    def test_unchanged_workbooks_are_skipped(self):
+        customers = ingestion.ingest_customers(self.customers_path)
+        self.assertEqual(customers, {'skipped': False, 'created': 300, 'updated': 0, 'deleted': 0})
+        loans = ingestion.ingest_loans(self.loans_path)
+        self.assertEqual(loans['created'], Loan.objects.count())
+
+        self.assertEqual(ingestion.ingest_customers(self.customers_path), {'skipped': True})
+        self.assertEqual(ingestion.ingest_loans(self.loans_path, customers_changed=False), {'skipped': True})
+
+    def test_only_changed_rows_are_applied(self):
+        ingestion.ingest_customers(self.customers_path)
+        Customer.objects.filter(customer_id=2).update(current_debt=Decimal('500'))
+
+        df = pd.read_excel(self.customers_path)
+        df.loc[df['Customer ID'] == 2, 'Monthly Salary'] = 99000
+        df = df[df['Customer ID'] != 3]
+        new_row = df[df['Customer ID'] == 1].assign(**{'Customer ID': 1000})
+        pd.concat([df, new_row]).to_excel(self.customers_path, index=False)
+
+        summary = ingestion.ingest_customers(self.customers_path)
+        self.assertEqual(summary, {'skipped': False, 'created': 1, 'updated': 1, 'deleted': 1})
+
+        updated = Customer.objects.get(customer_id=2)
+        self.assertEqual(updated.monthly_salary, Decimal('99000'))
+        self.assertEqual(updated.current_debt, Decimal('500'))
+        self.assertFalse(Customer.objects.filter(customer_id=3).exists())
+        self.assertTrue(Customer.objects.filter(customer_id=1000).exists())
+
+    def test_file_does_not_overwrite_customers_it_did_not_load(self):
+        """
+        A workbook row colliding with a customer registered through the API
+        is skipped after the first load, until a full run takes it over.
+        """
+        ingestion.ingest_customers(self.customers_path)
+        response = self.client.post('/api/register/', {
+            'first_name': 'API', 'last_name': 'User', 'age': 30, 'monthly_income': 50000, 'phone_number': 9000000000
+        }, content_type='application/json')
+        customer_id = response.json()['customer_id']
+
+        df = pd.read_excel(self.customers_path)
+        new_row = df[df['Customer ID'] == 1].assign(**{'Customer ID': customer_id})
+        pd.concat([df, new_row]).to_excel(self.customers_path, index=False)
+
+        with self.assertLogs(ingestion.logger, 'WARNING') as logs:
+            summary = ingestion.ingest_customers(self.customers_path)
+        self.assertEqual(summary, {'skipped': False, 'created': 0, 'updated': 0, 'deleted': 0})
+        self.assertIn(str(customer_id), logs.output[0])
+        self.assertEqual(Customer.objects.get(customer_id=customer_id).first_name, 'API')
+
+        summary = ingestion.ingest_customers(self.customers_path, full=True)
+        self.assertEqual(summary['updated'], 301)
+        self.assertNotEqual(Customer.objects.get(customer_id=customer_id).first_name, 'API')
+
+    def write_formats(self, source, stem):
+        """
+        Writes the workbook as CSV, Parquet and Arrow; returns {format: path}.
+        """
+        df = pd.read_excel(source)
+        paths = {'xlsx': source}
+        paths['csv'] = self.tmp / f'{stem}.csv'
+        df.to_csv(paths['csv'], index=False)
+        paths['parquet'] = self.tmp / f'{stem}.parquet'
+        df.to_parquet(paths['parquet'], index=False)
+        paths['arrow'] = self.tmp / f'{stem}.arrow'
+        df.to_feather(paths['arrow'])
+        return paths
+
+    def test_all_formats_read_the_same_rows(self):
+        for source, stem, columns, dates in (
+            (self.customers_path, 'customers', ingestion.CUSTOMER_COLUMNS, ()),
+            (self.loans_path, 'loans', ingestion.LOAN_COLUMNS, ingestion.LOAN_DATE_COLUMNS),
+        ):
+            paths = self.write_formats(source, stem)
+            frames = {
+                file_format: pd.concat(list(ingestion.read_chunks(path, columns, date_columns=dates)))
+                for file_format, path in paths.items()
+            }
+            for file_format in ('csv', 'parquet', 'arrow'):
+                with self.subTest(dataset=stem, file_format=file_format):
+                    self.assertEqual(list(frames[file_format].columns), columns)
+                    self.assertEqual(
+                        frames[file_format].to_dict('records'), frames['xlsx'].to_dict('records')
+                    )
+
+    def test_ingest_from_csv_and_parquet(self):
+        customers_csv = self.write_formats(self.customers_path, 'customers')['csv']
+        loans_parquet = self.write_formats(self.loans_path, 'loans')['parquet']
+        self.assertEqual(ingestion.ingest_customers(customers_csv)['created'], 300)
+        loans = ingestion.ingest_loans(loans_parquet)
+        self.assertEqual(loans['created'], Loan.objects.count())
+        self.assertGreater(loans['created'], 0)
+
+    def test_chunks_are_written_as_they_are_read(self):
+        """
+        Each chunk is applied before the next is read, and deletions are
+        still detected across all chunks.
+        """
+        path = self.write_formats(self.customers_path, 'customers')['csv']
+        with mock.patch.object(ingestion, 'CHUNK_ROWS', 50):
+            self.assertEqual(ingestion.ingest_customers(path)['created'], 300)
+
+            df = pd.read_csv(path)
+            df.loc[df['Customer ID'] == 120, 'Monthly Salary'] = 99000
+            df[df['Customer ID'] != 250].to_csv(path, index=False)
+
+            written = []
+            chunks = ingestion.read_chunks(path, ingestion.CUSTOMER_COLUMNS, optional=('Age',))
+
+            def tracked_chunks(*args, **kwargs):
+                for chunk in chunks:
+                    written.append(Customer.objects.get(customer_id=120).monthly_salary == Decimal('99000'))
+                    yield chunk
+            with mock.patch.object(ingestion, 'read_chunks', tracked_chunks):
+                summary = ingestion.ingest_customers(path)
+        self.assertEqual(summary, {'skipped': False, 'created': 0, 'updated': 1, 'deleted': 1})
+        # Customer 120 is in the third chunk; it is stored before the fourth is read.
+        self.assertEqual(written, [False, False, False, True, True, True])
+
+    def test_missing_required_column(self):
+        df = pd.read_excel(self.customers_path).drop(columns=['Monthly Salary', 'Age'])
+        path = self.tmp / 'customers.csv'
+        df.to_csv(path, index=False)
+        with self.assertRaisesMessage(ValueError, 'Monthly Salary'):
+            ingestion.ingest_customers(path)
+        # 'Age' is optional and gets filled with None
+        chunk = next(ingestion.read_chunks(path, ['Customer ID', 'Age'], optional=('Age',)))
+        self.assertTrue(chunk['Age'].isna().all())
+
+
+class StartupImportTests(SimpleTestCase):
+
+    def test_tasks_do_not_import_pandas(self):
+        """
+        Web and worker processes load api.tasks; pandas must stay lazy.
+        """
+        code = (
+            "import django, sys; django.setup(); import api.tasks; "
+            "print(sorted(m for m in ('pandas', 'numpy', 'openpyxl') if m in sys.modules))"
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        )
+        self.assertEqual(result.stdout.strip(), '[]')
+
+
+class AdminChangelistTests(TestCase):
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+
+    def add_customers_and_loans(self, count, start=1):
+        customers = Customer.objects.bulk_create([
+            Customer(
+                customer_id=i, first_name=f'First{i}', last_name=f'Last{i}', phone_number=i,
+                monthly_salary=Decimal('1000'), approved_limit=Decimal('36000')
+            )
+            for i in range(start, start + count)
+        ])
+        Loan.objects.bulk_create([
+            Loan(
+                customer=customer, loan_id=customer.customer_id, loan_amount=Decimal('1000'), tenure=12,
+                interest_rate=Decimal('10'), monthly_repayment=Decimal('100'), emis_paid_on_time=12,
+                start_date=date(2020, 1, 1), end_date=date(2021, 1, 1)
+            )
+            for customer in customers
+        ])
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_loan_changelist_has_no_per_row_queries(self):
+        self.add_customers_and_loans(5)
+        few = self.changelist_queries('/admin/api/loan/')
+        self.add_customers_and_loans(40, start=6)
+        self.assertEqual(self.changelist_queries('/admin/api/loan/'), few)
+
+    def test_search_by_id_and_name(self):
+        self.add_customers_and_loans(30)
+        response = self.client.get('/admin/api/customer/', {'q': '12'})
+        self.assertEqual([c.customer_id for c in response.context['cl'].result_list], [12])
+
+        response = self.client.get('/admin/api/customer/', {'q': 'first2'})
+        self.assertEqual(response.context['cl'].result_count, 11)  # First2, First20-29
+
+        response = self.client.get('/admin/api/loan/', {'q': '7'})
+        self.assertEqual([loan.loan_id for loan in response.context['cl'].result_list], [7])
+
+        response = self.client.get('/admin/api/loan/', {'q': 'abc'})
+        self.assertEqual(response.context['cl'].result_count, 0)
+
+
+def tearDownModule():
+    # Don't let decisions buffered by the API tests be flushed at exit.
+    decision_log.clear()
+
+
+@override_settings(DECISION_LOG_BATCH_SIZE=2, DECISION_LOG_FLUSH_SECONDS=3600, DECISION_LOG_MAX_BUFFER=5)
+class DecisionLogTests(TestCase):
+    """
+    Flushing is driven by calling flush_due() (one flusher tick) directly;
+    the background thread itself is covered by DecisionLogFlusherTests.
+    """
+
+    def setUp(self):
+        decision_log.clear()
+        self.addCleanup(decision_log.clear)
+        patcher = mock.patch.object(decision_log, '_ensure_flusher')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        Customer.objects.create(
+            customer_id=1, first_name='Test', last_name='User', age=25,
+            phone_number=9876543210, monthly_salary=Decimal('60000'),
+            approved_limit=Decimal('2200000')
+        )
+
+    def check_eligibility(self):
+        return self.client.post('/api/check-eligibility/', {
+            'customer_id': 1, 'loan_amount': 100000, 'interest_rate': 10.5, 'tenure': 12
+        }, content_type='application/json')
+
+    def check_unknown_customer(self):
+        services.check_loan_eligibility(99, 10000000, 1050, 12)
+
+    def run_flush_task(self, batch):
+        flush_decision_log_task.apply(args=[batch])
+
+    def test_decisions_are_buffered_then_flushed_in_a_batch(self):
+        with mock.patch.object(decision_log, '_queue', side_effect=self.run_flush_task) as queue:
+            self.check_eligibility()
+            decision_log.flush_due()
+            # Neither a full batch nor old enough yet
+            queue.assert_not_called()
+            self.assertEqual(decision_log.pending(), 1)
+
+            self.check_unknown_customer()
+            # Recording never hands off on the request path
+            queue.assert_not_called()
+            self.assertEqual(EligibilityDecision.objects.count(), 0)
+            decision_log.flush_due()
+        queue.assert_called_once()
+        self.assertEqual(decision_log.pending(), 0)
+
+        approved = EligibilityDecision.objects.get(customer_id=1)
+        self.assertTrue(approved.approval)
+        self.assertEqual(approved.reason, 'approved')
+        self.assertEqual(approved.loan_amount, 10000000)
+        self.assertEqual(approved.interest_rate, 1050)
+        self.assertEqual(approved.monthly_installment, 881486)
+        self.assertEqual(approved.credit_score, 80)  # 30 + 0 + 15 + 35
+        self.assertEqual(approved.score_components['past_loans_paid_on_time'], 30)
+        self.assertFalse(approved.score_components['debt_over_limit'])
+        self.assertEqual(EligibilityDecision.objects.get(customer_id=99).reason, 'customer_not_found')
+
+    def test_redelivered_batch_is_stored_once(self):
+        with mock.patch.object(decision_log, '_queue') as queue:
+            self.check_eligibility()
+            self.check_eligibility()
+            decision_log.flush_due()
+        batch = queue.call_args.args[0]
+        decision_log.write_decisions(batch)
+        decision_log.write_decisions(batch)
+        self.assertEqual(EligibilityDecision.objects.count(), 2)
+
+    def test_broker_outage_applies_backpressure(self):
+        """
+        Batches stay buffered while the broker is down; once the buffer is
+        full the caller writes the oldest batch itself.
+        """
+        with mock.patch.object(decision_log, '_queue', side_effect=OSError('broker down')) as queue:
+            for _ in range(4):
+                self.check_eligibility()
+                decision_log.flush_due()
+            # One failed hand-off, then no retry until the flush interval passes
+            queue.assert_called_once()
+            self.assertEqual(decision_log.pending(), 4)
+            self.assertEqual(EligibilityDecision.objects.count(), 0)
+
+            self.check_eligibility()
+        self.assertEqual(decision_log.pending(), 3)
+        self.assertEqual(EligibilityDecision.objects.count(), 2)
+
+    def test_query_api(self):
+        with mock.patch.object(decision_log, '_queue', side_effect=self.run_flush_task):
+            self.check_eligibility()
+            self.check_unknown_customer()
+            decision_log.flush_due()
+
+        # Staff only
+        self.assertEqual(self.client.get('/api/decision-log/').status_code, 403)
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+
+        response = self.client.get('/api/decision-log/', {'customer_id': 1})
+        self.assertEqual(response.status_code, 200)
+        [decision] = response.json()['results']
+        self.assertEqual(decision['loan_amount'], 100000.0)
+        self.assertEqual(decision['monthly_installment'], 8814.86)
+        self.assertEqual(decision['reason'], 'approved')
+
+        response = self.client.get('/api/decision-log/', {'approval': 'false'})
+        self.assertEqual([d['customer_id'] for d in response.json()['results']], [99])
+
+        response = self.client.get('/api/decision-log/', {'limit': 0})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/api/decision-log/', {'reason': 'unknown'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_query_api_pages_through_simultaneous_decisions(self):
+        """
+        Paging on (decided_at, decision_id) neither skips nor repeats
+        decisions that share a timestamp.
+        """
+        decided_at = timezone.now()
+        for i in range(5):
+            EligibilityDecision.objects.create(
+                decision_id=uuid.uuid4(), decided_at=decided_at, customer_id=i, loan_amount=0,
+                interest_rate=0, tenure=1, approval=False, reason='low_credit_score', monthly_installment=0
+            )
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+
+        seen = []
+        params = {'limit': 2}
+        while True:
+            results = self.client.get('/api/decision-log/', params).json()['results']
+            if not results:
+                break
+            seen += [d['customer_id'] for d in results]
+            params = {'limit': 2, 'before': results[-1]['decided_at'], 'before_id': results[-1]['decision_id']}
+        self.assertEqual(sorted(seen), [0, 1, 2, 3, 4])
+
+        response = self.client.get('/api/decision-log/', {'before_id': str(uuid.uuid4())})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(DECISION_LOG_BATCH_SIZE=100, DECISION_LOG_FLUSH_SECONDS=0.2, DECISION_LOG_MAX_BUFFER=1000)
+class DecisionLogFlusherTests(SimpleTestCase):
+
+    def test_lone_decision_is_flushed_without_more_traffic(self):
+        decision_log.clear()
+        self.addCleanup(decision_log.clear)
+        queued = []
+        with mock.patch.object(decision_log, '_queue', side_effect=queued.append):
+            decision_log.record(1, 10000000, 1050, 12, {'approval': False}, 'low_credit_score')
+            deadline = time.monotonic() + 5
+            while not queued and time.monotonic() < deadline:
+                time.sleep(0.05)
+        self.assertEqual([len(batch) for batch in queued], [1])
+        self.assertEqual(decision_log.pending(), 0)
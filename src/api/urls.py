@@ -1,12 +1,15 @@
 from django.urls import path
 from .views import (
-    RegisterView, CheckEligibilityView, CreateLoanView,
-    ViewLoanView, ViewLoansByCustomerView
+    RegisterView, BulkRegisterView, CheckEligibilityView, CreateLoanView,
+    ViewLoanView, ViewLoansByCustomerView, DecisionLogView
 )
 
 urlpatterns = [
     # /api/register/
     path('register/', RegisterView.as_view(), name='register-customer'),
+
+    # /api/register/bulk/
+    path('register/bulk/', BulkRegisterView.as_view(), name='register-customers-bulk'),
     
     # /api/check-eligibility/
     path('check-eligibility/', CheckEligibilityView.as_view(), name='check-eligibility'),
@@ -20,4 +23,7 @@ urlpatterns = [
     
     # /api/view-loans/<customer_id>/
     path('view-loans/<int:customer_id>/', ViewLoansByCustomerView.as_view(), name='view-loans-by-customer'),
+
+    # /api/decision-log/
+    path('decision-log/', DecisionLogView.as_view(), name='decision-log'),
 ]
\ No newline at end of file
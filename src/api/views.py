@@ -1,18 +1,23 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Max
-from .models import Customer, Loan
-from . import services
+from rest_framework.permissions import IsAdminUser
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Q
+from .models import Customer, Loan, EligibilityDecision
+from . import services, money
 from .serializers import (
     CustomerRegistrationSerializer, CustomerResponseSerializer,
     LoanEligibilityRequestSerializer, LoanEligibilityResponseSerializer,
     CreateLoanRequestSerializer, CreateLoanResponseSerializer,
-    ViewLoanSerializer, ViewLoansByCustomerSerializer
+    ViewLoanSerializer, ViewLoansByCustomerSerializer,
+    DecisionLogQuerySerializer, EligibilityDecisionSerializer
 )
 from datetime import date
 from dateutil.relativedelta import relativedelta
-from decimal import Decimal
+from core import db_router
 
 class RegisterView(APIView):
     """
@@ -28,22 +33,22 @@ class RegisterView(APIView):
             # 2. Call our business logic from services.py
             approved_limit = services.calculate_approved_limit(data['monthly_salary'])
 
-            # --- START FIX ---
-            # Manually find the next available customer_id
-            max_id_obj = Customer.objects.aggregate(max_id=Max('customer_id'))
-            new_customer_id = (max_id_obj['max_id'] or 0) + 1
-            # --- END FIX ---
-
-            # 3. Create the new customer in the database
-            customer = Customer.objects.create(
-                customer_id=new_customer_id,  # <-- We now provide the ID
-                first_name=data['first_name'],
-                last_name=data['last_name'],
-                age=data.get('age'), # .get() safely handles if age is missing
-                monthly_salary=data['monthly_salary'],
-                phone_number=data['phone_number'],
-                approved_limit=approved_limit
-            )
+            with transaction.atomic():
+                # Manually find the next available customer_id
+                new_customer_id = services.allocate_customer_ids(1)[0]
+
+                # 3. Create the new customer in the database
+                customer = Customer.objects.create(
+                    customer_id=new_customer_id,  # <-- We now provide the ID
+                    first_name=data['first_name'],
+                    last_name=data['last_name'],
+                    age=data.get('age'), # .get() safely handles if age is missing
+                    monthly_salary=data['monthly_salary'],
+                    phone_number=data['phone_number'],
+                    approved_limit=approved_limit
+                )
+            # Clients without cookies still read the new customer from the primary
+            db_router.pin_to_primary(customer_ids=[customer.customer_id])
 
             # 4. Serialize the created customer for the response
             response_serializer = CustomerResponseSerializer(customer)
@@ -53,21 +58,115 @@ class RegisterView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class BulkRegisterView(APIView):
+    """
+    API endpoint to register many customers in one request.
+    POST /api/register/bulk/
+
+    The body is a list of objects in the same format as /api/register/.
+    Each row is validated on its own; valid rows are created together and
+    invalid ones are reported back by their index in the list.
+    """
+    def post(self, request):
+        if not isinstance(request.data, list):
+            return Response({"error": "Expected a list of customers."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > settings.BULK_REGISTER_MAX_ROWS:
+            return Response(
+                {"error": f"At most {settings.BULK_REGISTER_MAX_ROWS} customers per request."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # 1. Validate every row, keeping track of where it came from
+        results = [None] * len(request.data)
+        valid_rows = []
+        for index, row in enumerate(request.data):
+            serializer = CustomerRegistrationSerializer(data=row)
+            if serializer.is_valid():
+                valid_rows.append((index, serializer.validated_data))
+            else:
+                results[index] = {'index': index, 'status': 'error', 'errors': serializer.errors}
+
+        if valid_rows:
+            # 2. Approved limits for the whole batch in one pass. A large enough
+            # income gives a limit that doesn't fit the column; report that row
+            # instead of letting it fail the whole insert.
+            approved_limits = services.calculate_approved_limits(
+                data['monthly_salary'] for _, data in valid_rows
+            )
+            limit_field = Customer._meta.get_field('approved_limit')
+            fitting = []
+            for (index, data), approved_limit in zip(valid_rows, approved_limits):
+                try:
+                    limit_field.run_validators(approved_limit)
+                except DjangoValidationError:
+                    results[index] = {
+                        'index': index,
+                        'status': 'error',
+                        'errors': {'monthly_income': [
+                            f"The approved limit for this income ({approved_limit}) exceeds the maximum allowed."
+                        ]}
+                    }
+                else:
+                    fitting.append(((index, data), approved_limit))
+            valid_rows = [row for row, _ in fitting]
+            approved_limits = [approved_limit for _, approved_limit in fitting]
+
+        if valid_rows:
+            # 3. One contiguous ID block and a single batched insert
+            with transaction.atomic():
+                customer_ids = services.allocate_customer_ids(len(valid_rows))
+                customers = Customer.objects.bulk_create([
+                    Customer(
+                        customer_id=customer_id,
+                        first_name=data['first_name'],
+                        last_name=data['last_name'],
+                        age=data.get('age'),
+                        monthly_salary=data['monthly_salary'],
+                        phone_number=data['phone_number'],
+                        approved_limit=approved_limit
+                    )
+                    for customer_id, (_, data), approved_limit in zip(customer_ids, valid_rows, approved_limits)
+                ], batch_size=1000)
+            db_router.pin_to_primary(customer_ids=customer_ids)
+
+            for (index, _), customer in zip(valid_rows, customers):
+                results[index] = {
+                    'index': index,
+                    'status': 'created',
+                    'customer': CustomerResponseSerializer(customer).data
+                }
+
+        if not valid_rows:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif len(valid_rows) < len(results):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response({'results': results}, status=response_status)
+
+
 class CheckEligibilityView(APIView):
     """
     API endpoint to check loan eligibility for a customer.
     POST /api/check-eligibility/
     """
+    # Scoring reads go to a replica; the current_debt refresh (if any)
+    # is a write and still goes to the primary.
+    read_replica = True
+
     def post(self, request):
         serializer = LoanEligibilityRequestSerializer(data=request.data)
         if serializer.is_valid():
             data = serializer.validated_data
+            # Don't score a customer from a replica that may not have their latest loan yet
+            if db_router.is_pinned_to_primary(customer_id=data['customer_id']):
+                db_router.read_from_primary()
             
             # All logic is in the service function
             eligibility_result = services.check_loan_eligibility(
                 customer_id=data['customer_id'],
-                loan_amount=data['loan_amount'],
-                interest_rate=data['interest_rate'],
+                loan_amount_paise=data['loan_amount'],
+                interest_rate_bps=data['interest_rate'],
                 tenure=data['tenure']
             )
             
@@ -90,6 +189,7 @@ class CreateLoanView(APIView):
             
         data = serializer.validated_data
         customer_id = data['customer_id']
+        # Amounts arrive as integer paise / basis points (see FixedPointField)
         loan_amount = data['loan_amount']
         interest_rate = data['interest_rate']
         tenure = data['tenure']
@@ -97,8 +197,8 @@ class CreateLoanView(APIView):
         # 1. Check eligibility first
         eligibility_result = services.check_loan_eligibility(
             customer_id=customer_id,
-            loan_amount=loan_amount,
-            interest_rate=interest_rate,
+            loan_amount_paise=loan_amount,
+            interest_rate_bps=interest_rate,
             tenure=tenure
         )
         
@@ -126,15 +226,21 @@ class CreateLoanView(APIView):
         # Calculate end_date based on tenure
         end_date = start_date + relativedelta(months=tenure)
         
-        new_loan = Loan.objects.create(
-            customer=customer,
-            loan_amount=loan_amount,
-            tenure=tenure,
-            interest_rate=eligibility_result['corrected_interest_rate'], # Use corrected rate
-            monthly_repayment=Decimal(str(monthly_installment)),
-            emis_paid_on_time=0, # New loan
-            start_date=start_date,
-            end_date=end_date
+        with transaction.atomic():
+            new_loan = Loan.objects.create(
+                loan_id=services.allocate_loan_ids(1)[0],
+                customer=customer,
+                loan_amount=money.from_paise(loan_amount),
+                tenure=tenure,
+                interest_rate=money.from_basis_points(eligibility_result['corrected_interest_rate']), # Use corrected rate
+                monthly_repayment=money.from_paise(monthly_installment),
+                emis_paid_on_time=0, # New loan
+                start_date=start_date,
+                end_date=end_date
+            )
+        db_router.pin_to_primary(
+            customer_ids=[customer.customer_id],
+            loan_ids=[new_loan.loan_id]
         )
         
         # 3. Send success response
@@ -154,6 +260,8 @@ class ViewLoanView(APIView):
     API endpoint to view details of a specific loan.
     GET /api/view-loan/<loan_id>/
     """
+    read_replica = True
+
     def get(self, request, loan_id):
         try:
             # select_related('customer') is an optimization.
@@ -170,6 +278,8 @@ class ViewLoansByCustomerView(APIView):
     API endpoint to view all loans for a specific customer.
     GET /api/view-loans/<customer_id>/
     """
+    read_replica = True
+
     def get(self, request, customer_id):
         # Check if customer exists first
         if not Customer.objects.filter(customer_id=customer_id).exists():
@@ -182,4 +292,48 @@ class ViewLoansByCustomerView(APIView):
             return Response([], status=status.HTTP_200_OK) 
         
         serializer = ViewLoansByCustomerSerializer(loans, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class DecisionLogView(APIView):
+    """
+    API endpoint to search the eligibility decision log, newest first.
+    Staff users only.
+    GET /api/decision-log/?customer_id=&approval=&reason=&since=&before=&before_id=&limit=
+
+    Pages are keyset-paginated on (decided_at, decision_id): pass the last
+    decision's decided_at and decision_id as before/before_id for the next
+    page, so decisions made in the same instant are neither skipped nor
+    repeated.
+
+    Decisions are stored in the background (see api/decision_log.py), so the
+    latest few seconds of decisions may not be visible yet.
+    """
+    permission_classes = [IsAdminUser]
+    read_replica = True
+
+    def get(self, request):
+        serializer = DecisionLogQuerySerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        params = serializer.validated_data
+
+        decisions = EligibilityDecision.objects.order_by('-decided_at', '-decision_id')
+        if 'customer_id' in params:
+            decisions = decisions.filter(customer_id=params['customer_id'])
+        if params['approval'] is not None:
+            decisions = decisions.filter(approval=params['approval'])
+        if 'reason' in params:
+            decisions = decisions.filter(reason=params['reason'])
+        if 'since' in params:
+            decisions = decisions.filter(decided_at__gte=params['since'])
+        if 'before_id' in params:
+            decisions = decisions.filter(
+                Q(decided_at__lt=params['before'])
+                | Q(decided_at=params['before'], decision_id__lt=params['before_id'])
+            )
+        elif 'before' in params:
+            decisions = decisions.filter(decided_at__lt=params['before'])
+
+        results = EligibilityDecisionSerializer(decisions[:params['limit']], many=True).data
+        return Response({'results': results}, status=status.HTTP_200_OK)
@@ -0,0 +1,42 @@
+"""
+Common setup for the benchmark scripts. They run as plain scripts from the
+src/ directory, so their own directory is on sys.path and they can do:
+
+    from _setup import setup_django
+    setup_django()
+"""
+import os
+import sys
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent
+
+# Used for any variable not already set: the project settings on an
+# in-memory SQLite database, which is all most benchmarks need. Set SQL_*
+# to run against PostgreSQL instead.
+DEFAULT_ENV = {
+    'DJANGO_SETTINGS_MODULE': 'core.settings',
+    'SECRET_KEY': 'benchmark',
+    'SQL_ENGINE': 'django.db.backends.sqlite3',
+    'SQL_DATABASE': ':memory:',
+}
+
+
+def benchmark_env() -> dict:
+    """
+    Returns the environment for a child interpreter: os.environ over DEFAULT_ENV.
+    """
+    return {**DEFAULT_ENV, **os.environ}
+
+
+def setup_django():
+    """
+    Puts src/ on sys.path, fills in DEFAULT_ENV and calls django.setup().
+    """
+    sys.path.insert(0, str(SRC_DIR))
+    for name, value in DEFAULT_ENV.items():
+        os.environ.setdefault(name, value)
+
+    import django
+
+    django.setup()
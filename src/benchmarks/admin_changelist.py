@@ -0,0 +1,99 @@
+"""
+Times the Customer and Loan admin changelists against a synthetic dataset
+of --customers customers with --loans-per-customer loans each, and reports
+the number of queries per page (which must not grow with the row count).
+
+The data goes into a throwaway test database created from the configured
+DATABASES (so point SQL_* at PostgreSQL to exercise the estimated counts and
+trigram indexes; with SQLite every count is exact).
+
+Run from the src/ directory:
+    python benchmarks/admin_changelist.py --customers 200000 --loans-per-customer 5
+"""
+import argparse
+import time
+from datetime import date
+from decimal import Decimal
+
+from _setup import setup_django
+
+setup_django()
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from api.models import Customer, Loan
+
+BATCH_SIZE = 5000
+
+PAGES = {
+    'customers': '/admin/api/customer/',
+    'customers, search by ID': '/admin/api/customer/?q=4242',
+    'customers, search by name': '/admin/api/customer/?q=irst42',
+    'loans': '/admin/api/loan/',
+    'loans, search by ID': '/admin/api/loan/?q=4242',
+    'loans, page 50': '/admin/api/loan/?p=50',
+}
+
+
+def build_dataset(customers, loans_per_customer):
+    for start in range(1, customers + 1, BATCH_SIZE):
+        ids = range(start, min(start + BATCH_SIZE, customers + 1))
+        Customer.objects.bulk_create([
+            Customer(
+                customer_id=i, first_name=f'First{i}', last_name=f'Last{i}', phone_number=9000000000 + i,
+                monthly_salary=Decimal('50000'), approved_limit=Decimal('1800000')
+            )
+            for i in ids
+        ])
+        Loan.objects.bulk_create([
+            Loan(
+                customer_id=i, loan_id=i * loans_per_customer + n, loan_amount=Decimal('100000'), tenure=12,
+                interest_rate=Decimal('12'), monthly_repayment=Decimal('8885'), emis_paid_on_time=12,
+                start_date=date(2020, 1, 1), end_date=date(2021 + n % 5, 1, 1)
+            )
+            for i in ids for n in range(loans_per_customer)
+        ])
+    with connection.cursor() as cursor:
+        # Give the planner (and the estimated counts) fresh statistics.
+        cursor.execute('ANALYZE')
+
+
+def time_page(client, url, repeat):
+    timings = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append(time.perf_counter() - started)
+        assert response.status_code == 200, f"{url} returned {response.status_code}"
+    return min(timings), len(queries), response.context['cl'].result_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--customers', type=int, default=20000)
+    parser.add_argument('--loans-per-customer', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=3, help='Requests per page; the fastest counts.')
+    options = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        started = time.perf_counter()
+        build_dataset(options.customers, options.loans_per_customer)
+        print(f"{Customer.objects.count()} customers, {Loan.objects.count()} loans "
+              f"on {connection.vendor} (built in {time.perf_counter() - started:.1f} s)")
+
+        client = Client()
+        client.force_login(User.objects.create_superuser('benchmark', 'benchmark@example.com', 'benchmark'))
+        for name, url in PAGES.items():
+            best, query_count, result_count = time_page(client, url, options.repeat)
+            print(f"{name:>26}: {best * 1000:8.1f} ms, {query_count:2d} queries, {result_count} rows reported")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Compares how long each ingestion input format takes to parse, using the
+bundled loan workbook repeated --scale times (Loan IDs are offset so rows
+stay distinct). Only parsing is timed, through api.ingestion.read_chunks,
+with the same column projection and date handling the ingest task uses.
+
+Run from the src/ directory:
+    python benchmarks/ingest_formats.py --scale 200
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from _setup import SRC_DIR, setup_django
+
+setup_django()
+
+import pandas as pd
+from api import ingestion
+
+
+def build_inputs(directory, scale):
+    base = pd.read_excel(SRC_DIR / 'loan_data.xlsx', engine='openpyxl')
+    step = int(base['Loan ID'].max()) + 1
+    df = pd.concat(
+        [base.assign(**{'Loan ID': base['Loan ID'] + copy * step}) for copy in range(scale)],
+        ignore_index=True
+    )
+    paths = {
+        'xlsx': directory / 'loans.xlsx',
+        'csv': directory / 'loans.csv',
+        'parquet': directory / 'loans.parquet',
+        'arrow': directory / 'loans.arrow',
+    }
+    df.to_excel(paths['xlsx'], index=False, engine='openpyxl')
+    df.to_csv(paths['csv'], index=False)
+    df.to_parquet(paths['parquet'], index=False)
+    df.to_feather(paths['arrow'])
+    return len(df), paths
+
+
+def parse(path):
+    rows = 0
+    for chunk in ingestion.read_chunks(path, ingestion.LOAN_COLUMNS, date_columns=ingestion.LOAN_DATE_COLUMNS):
+        rows += len(chunk)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=int, default=50, help='How many copies of loan_data.xlsx to parse.')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per format; the fastest counts.')
+    options = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rows, paths = build_inputs(Path(tmp), options.scale)
+        print(f"{rows} loan rows")
+        baseline = None
+        for file_format, path in paths.items():
+            timings = []
+            for _ in range(options.repeat):
+                started = time.perf_counter()
+                assert parse(path) == rows
+                timings.append(time.perf_counter() - started)
+            best = min(timings)
+            baseline = baseline or best
+            size_mb = path.stat().st_size / 1e6
+            print(f"{file_format:>8}: {best * 1000:8.1f} ms  ({size_mb:5.1f} MB, {baseline / best:5.1f}x vs xlsx)")
+
+
+if __name__ == '__main__':
+    main()
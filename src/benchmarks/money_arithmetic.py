@@ -0,0 +1,64 @@
+"""
+Benchmarks the eligibility money path: the old Decimal/str/float round-trips
+against the integer paise/basis-point arithmetic now used by services.py,
+for short and long tenures.
+
+Run from the src/ directory:
+    python benchmarks/money_arithmetic.py
+"""
+import timeit
+from decimal import Decimal
+
+from _setup import setup_django
+
+setup_django()
+
+from api import money, services
+
+LOAN_AMOUNT = Decimal('100000.00')
+INTEREST_RATE = Decimal('10.50')
+TENURES = (12, 120, 360, 600)
+CURRENT_DEBT = Decimal('12500.00')
+MONTHLY_SALARY = Decimal('60000.00')
+
+
+def legacy_path(tenure):
+    # Mirrors the previous check_loan_eligibility/calculate_monthly_installment.
+    loan_amount = Decimal(str(LOAN_AMOUNT))
+    interest_rate = Decimal(str(INTEREST_RATE))
+    r = float(interest_rate / 100 / 12)
+    P = float(loan_amount)
+    n = float(tenure)
+    emi = round(P * r * (pow(1 + r, n)) / (pow(1 + r, n) - 1), 2)
+    total_monthly_debt = CURRENT_DEBT + Decimal(str(emi))
+    approved = total_monthly_debt <= MONTHLY_SALARY * Decimal('0.5')
+    return approved, float(interest_rate), float(interest_rate), float(emi)
+
+
+def paise_path(tenure):
+    # Serializer boundary: validated Decimals become integers once.
+    loan_amount = money.to_paise(LOAN_AMOUNT)
+    interest_rate = money.to_basis_points(INTEREST_RATE)
+    emi = services.calculate_monthly_installment_paise(loan_amount, interest_rate, tenure)
+    # ORM boundary: the aggregated debt and salary come back as Decimals.
+    total_monthly_debt = money.to_paise(CURRENT_DEBT) + emi
+    approved = total_monthly_debt * 2 <= money.to_paise(MONTHLY_SALARY)
+    return approved, interest_rate, interest_rate, emi
+
+
+def emi_only(tenure):
+    return services.calculate_monthly_installment_paise(10000000, 1050, tenure)
+
+
+def main(number=100000):
+    for tenure in TENURES:
+        legacy = legacy_path(tenure)
+        paise = paise_path(tenure)
+        assert legacy[0] == paise[0] and legacy[3] == paise[3] / 100, (tenure, legacy, paise)
+
+        for name, func in (('decimal/float', legacy_path), ('integer paise', paise_path), ('EMI only', emi_only)):
+            best = min(timeit.repeat(lambda: func(tenure), number=number, repeat=5))
+            print(f"{tenure:>3} months, {name:>14}: {best / number * 1e6:.2f} us/call")
+
+if __name__ == '__main__':
+    main()
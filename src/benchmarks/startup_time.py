@@ -0,0 +1,106 @@
+"""
+Measures cold-start import time of the web and worker entry points with
+`python -X importtime`, and fails if one goes over its budget or loads a
+heavy data library that should only be imported lazily.
+
+Run from the src/ directory (exits non-zero on a regression):
+    python benchmarks/startup_time.py
+    python benchmarks/startup_time.py --repeat 5 --verbose
+"""
+import argparse
+import re
+import subprocess
+import sys
+import time
+
+from _setup import SRC_DIR, benchmark_env
+
+# name -> arguments after `python -X importtime`
+TARGETS = {
+    'manage': ['manage.py', 'check'],
+    'wsgi': ['-c', 'import core.wsgi'],
+    'asgi': ['-c', 'import core.asgi'],
+    # What a Celery worker imports before it starts consuming
+    'worker': ['-c', 'from core.celery import app; app.loader.import_default_modules()'],
+}
+
+# Total import time allowed per entry point, in milliseconds. Measured runs
+# take 370-580 ms, so these leave room for noise; the LAZY_MODULES check
+# below is what reliably catches an eager pandas import (about +300 ms).
+BUDGETS_MS = {
+    'manage': 800,
+    'wsgi': 800,
+    'asgi': 800,
+    'worker': 900,
+}
+
+# Must only be imported inside the code paths that need them.
+LAZY_MODULES = {'pandas', 'numpy', 'openpyxl', 'pyarrow'}
+
+LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def measure(args):
+    """
+    Runs one cold interpreter and returns (total_import_ms, wall_ms, modules, top).
+    `top` lists the slowest top-level imports by cumulative time.
+    """
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        cwd=SRC_DIR, env=benchmark_env(), capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{result.stderr[-2000:]}")
+
+    total_us = 0
+    modules = set()
+    top = []
+    for match in LINE.finditer(result.stderr):
+        self_us, cumulative_us, indent, module = match.groups()
+        total_us += int(self_us)
+        modules.add(module)
+        if len(indent) == 1:
+            top.append((int(cumulative_us) / 1000, module))
+    top.sort(reverse=True)
+    return total_us / 1000, wall_ms, modules, top[:10]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per target; the fastest counts.')
+    parser.add_argument('--verbose', action='store_true', help='Show the slowest top-level imports.')
+    parser.add_argument('targets', nargs='*', help=f"Any of: {', '.join(TARGETS)} (default: all).")
+    options = parser.parse_args()
+    unknown = set(options.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(sorted(unknown))}")
+
+    failures = []
+    for name in options.targets or TARGETS:
+        runs = [measure(TARGETS[name]) for _ in range(options.repeat)]
+        import_ms, wall_ms, modules, top = min(runs, key=lambda run: run[0])
+        eager = sorted(LAZY_MODULES & modules)
+        budget = BUDGETS_MS[name]
+
+        status = 'ok'
+        if import_ms > budget:
+            status = 'OVER BUDGET'
+            failures.append(f"{name}: {import_ms:.0f} ms of imports > {budget} ms budget")
+        if eager:
+            status = 'EAGER IMPORTS'
+            failures.append(f"{name}: imports {', '.join(eager)} at startup")
+
+        print(f"{name:>7}: imports {import_ms:6.0f} ms (budget {budget} ms), wall {wall_ms:6.0f} ms  {status}")
+        if options.verbose:
+            for cumulative_ms, module in top:
+                print(f"{'':>9}{cumulative_ms:8.1f} ms  {module}")
+
+    if failures:
+        print('\nStartup regressions:\n  ' + '\n  '.join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
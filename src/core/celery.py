@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.signals import task_postrun, task_prerun
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
@@ -13,4 +14,19 @@ app = Celery('core')
 app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Load task modules from all registered Django apps (i.e., from api/tasks.py)
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+
+
+# Task timing metrics (see core/task_metrics.py). The module is imported
+# inside the handlers because this file loads before Django is set up.
+@task_prerun.connect
+def _record_task_start(task_id=None, task=None, **kwargs):
+    from . import task_metrics
+    task_metrics.task_started(task_id)
+
+
+@task_postrun.connect
+def _record_task_end(task_id=None, task=None, state=None, **kwargs):
+    from . import task_metrics
+    queue = (task.request.delivery_info or {}).get('routing_key')
+    task_metrics.task_finished(task_id, task.name, state, queue)
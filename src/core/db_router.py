@@ -0,0 +1,135 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Reads go to a replica only when the current request (or task) has opted
+# in and nothing has been written yet. Writes always go to the primary, and
+# once something is written the rest of the request reads from the primary
+# too (read-your-writes). Across requests, the client is pinned to the
+# primary for REPLICA_PIN_SECONDS via a cookie set by the middleware below.
+# Clients that don't keep cookies are covered by pinning the customers and
+# loans that were written, in the shared cache (see pin_to_primary).
+_replica_reads = ContextVar('replica_reads', default=False)
+_wrote = ContextVar('wrote', default=False)
+
+PIN_COOKIE = 'pin_primary'
+PIN_KEY_PREFIX = 'replica_pin'
+
+
+def _replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def _pin_key(kind, object_id):
+    return f"{PIN_KEY_PREFIX}:{kind}:{object_id}"
+
+
+def pin_to_primary(customer_ids=(), loan_ids=()):
+    """
+    Makes reads about these customers and loans use the primary for the next
+    REPLICA_PIN_SECONDS, whichever client asks. Call after writing them.
+    """
+    if not _replicas():
+        return
+    keys = [_pin_key('customer', i) for i in customer_ids] + [_pin_key('loan', i) for i in loan_ids]
+    cache.set_many(dict.fromkeys(keys, 1), timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned_to_primary(customer_id=None, loan_id=None) -> bool:
+    if not _replicas():
+        return False
+    keys = []
+    if customer_id is not None:
+        keys.append(_pin_key('customer', customer_id))
+    if loan_id is not None:
+        keys.append(_pin_key('loan', loan_id))
+    return bool(keys) and bool(cache.get_many(keys))
+
+
+def read_from_primary():
+    """
+    Sends the remaining reads of the current request or task to the primary.
+    """
+    _replica_reads.set(False)
+
+
+def reading_from_replica() -> bool:
+    """
+    Whether reads made now may be served by a replica (and so may lag).
+    """
+    return bool(_replicas()) and _replica_reads.get() and not _wrote.get()
+
+
+@contextmanager
+def use_replica():
+    """
+    Sends reads inside the block to a replica, e.g. for batch scoring or
+    analytics jobs that run outside a request.
+    """
+    replica_token = _replica_reads.set(True)
+    wrote_token = _wrote.set(False)
+    try:
+        yield
+    finally:
+        _wrote.reset(wrote_token)
+        _replica_reads.reset(replica_token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Database router that splits reads across DATABASE_REPLICAS.
+    """
+    def db_for_read(self, model, **hints):
+        if not reading_from_replica():
+            return DEFAULT_DB_ALIAS
+        # Reads inside a transaction on the primary must see its writes.
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(_replicas())
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primary and replicas hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        return db not in _replicas()
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Enables replica reads for views that set `read_replica = True`, unless
+    the client wrote something within the last REPLICA_PIN_SECONDS, or the
+    customer or loan in the URL was written that recently.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        replica_token = _replica_reads.set(False)
+        wrote_token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if _wrote.get() and _replicas():
+                response.set_cookie(PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True)
+            return response
+        finally:
+            _wrote.reset(wrote_token)
+            _replica_reads.reset(replica_token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        if (
+            getattr(view_class, 'read_replica', False)
+            and PIN_COOKIE not in request.COOKIES
+            and not is_pinned_to_primary(view_kwargs.get('customer_id'), view_kwargs.get('loan_id'))
+        ):
+            _replica_reads.set(True)
+        return None
@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -41,6 +42,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.db_router.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -79,6 +81,48 @@ DATABASES = {
     }
 }
 
+# Read replicas
+# SQL_REPLICA_HOSTS is a comma-separated list of host[:port]; each replica
+# reuses the primary's credentials. SQL_REPLICA_DATABASE overrides the
+# database name, which also allows a second local database without a host.
+SQL_REPLICA_HOSTS = [h.strip() for h in os.environ.get('SQL_REPLICA_HOSTS', '').split(',') if h.strip()]
+SQL_REPLICA_DATABASE = os.environ.get('SQL_REPLICA_DATABASE')
+
+if not SQL_REPLICA_HOSTS and SQL_REPLICA_DATABASE:
+    SQL_REPLICA_HOSTS = [DATABASES['default']['HOST']]
+
+DATABASE_REPLICAS = []
+for index, replica_host in enumerate(SQL_REPLICA_HOSTS, start=1):
+    host, _, port = (replica_host or '').partition(':')
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': SQL_REPLICA_DATABASE or DATABASES['default']['NAME'],
+        'HOST': host or DATABASES['default']['HOST'],
+        'PORT': port or DATABASES['default']['PORT'],
+        # Tests run against the primary's test database only.
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+
+# After a write, the client reads from the primary for this many seconds
+# so it does not see replica lag.
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 10))
+
+
+# Largest batch accepted by POST /api/register/bulk/
+BULK_REGISTER_MAX_ROWS = int(os.environ.get('BULK_REGISTER_MAX_ROWS', 10000))
+
+# Eligibility decision log (see api/decision_log.py): decisions are buffered
+# per process and stored in batches of DECISION_LOG_BATCH_SIZE, or after
+# DECISION_LOG_FLUSH_SECONDS. Past DECISION_LOG_MAX_BUFFER buffered decisions
+# (broker down), requests write the backlog themselves.
+DECISION_LOG_BATCH_SIZE = int(os.environ.get('DECISION_LOG_BATCH_SIZE', 500))
+DECISION_LOG_FLUSH_SECONDS = int(os.environ.get('DECISION_LOG_FLUSH_SECONDS', 5))
+DECISION_LOG_MAX_BUFFER = int(os.environ.get('DECISION_LOG_MAX_BUFFER', 10000))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -119,6 +163,25 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Cache
+# Shared between the web and worker processes when CACHE_URL points at Redis
+# (task timing metrics and replica pins live here); docker-compose.yml points
+# it at the bundled Redis. Without it, each process gets its own memory cache.
+if os.environ.get('CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('CACHE_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
 # Celery Configuration Options
 # These also read from the .env file
 CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL")
@@ -126,4 +189,67 @@ CELERY_RESULT_BACKEND = os.environ.get("CELERY_RESULT_BACKEND")
 CELERY_ACCEPT_CONTENT = ['application/json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
-CELERY_TIMEZONE = 'UTC'
\ No newline at end of file
+CELERY_TIMEZONE = 'UTC'
+
+# Queues and routing
+# Long ingestion runs, latency-sensitive scoring and periodic maintenance each
+# get their own queue, served by separate workers (see docker-compose.yml),
+# so a long ingest never delays batch scoring.
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_ROUTES = {
+    'api.tasks.ingest_data_task': {'queue': 'ingest'},
+    'api.tasks.score_customers_task': {'queue': 'scoring'},
+    'api.tasks.maintain_loan_partitions_task': {'queue': 'maintenance'},
+    # Audit log batches are short writes; keep them off the maintenance
+    # queue so the nightly partition job can't hold them up.
+    'api.tasks.flush_decision_log_task': {'queue': 'default'},
+}
+
+# Acknowledge after the task finishes so a crashed worker's task is redelivered,
+# and only reserve one task per process so long tasks don't hoard the queue.
+# The scoring worker raises the prefetch on its command line.
+# (ingest_data_task opts out of the redelivery on a lost worker; see api/tasks.py.)
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = int(os.environ.get('CELERY_WORKER_PREFETCH_MULTIPLIER', 1))
+
+# Hard/soft time limits in seconds, per task
+CELERY_TASK_ANNOTATIONS = {
+    'api.tasks.ingest_data_task': {
+        'time_limit': int(os.environ.get('INGEST_TIME_LIMIT', 3600)),
+        'soft_time_limit': int(os.environ.get('INGEST_SOFT_TIME_LIMIT', 3300)),
+    },
+    'api.tasks.score_customers_task': {
+        'time_limit': int(os.environ.get('SCORING_TIME_LIMIT', 120)),
+        'soft_time_limit': int(os.environ.get('SCORING_SOFT_TIME_LIMIT', 100)),
+    },
+    'api.tasks.maintain_loan_partitions_task': {
+        'time_limit': int(os.environ.get('MAINTENANCE_TIME_LIMIT', 900)),
+        'soft_time_limit': int(os.environ.get('MAINTENANCE_SOFT_TIME_LIMIT', 840)),
+    },
+    'api.tasks.flush_decision_log_task': {
+        'time_limit': int(os.environ.get('DECISION_LOG_TIME_LIMIT', 60)),
+        'soft_time_limit': int(os.environ.get('DECISION_LOG_SOFT_TIME_LIMIT', 50)),
+    },
+}
+
+# With acks_late, Redis hands an unacknowledged task to another worker once
+# the visibility timeout passes, so it has to outlast the longest time limit
+# or a long ingest would be started a second time while still running.
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'visibility_timeout': max(limits['time_limit'] for limits in CELERY_TASK_ANNOTATIONS.values()) + 600,
+}
+
+# Periodic tasks, run by `celery -A core beat`
+CELERY_BEAT_SCHEDULE = {
+    'maintain-loan-partitions': {
+        'task': 'api.tasks.maintain_loan_partitions_task',
+        'schedule': crontab(hour=1, minute=0),
+    },
+}
+
+
+# Loan partitioning
+# api_loan is range-partitioned by end_date (one partition per year) on
+# PostgreSQL. This many future years are kept pre-created.
+LOAN_PARTITION_YEARS_AHEAD = int(os.environ.get('LOAN_PARTITION_YEARS_AHEAD', 5))
\ No newline at end of file
@@ -0,0 +1,64 @@
+import logging
+import time
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Per-task timing counters, kept in the Django cache so every worker process
+# adds to the same totals (when CACHE_URL points at Redis). Read them with
+# `python manage.py task_timings`.
+KEY_PREFIX = 'task_timings'
+FIELDS = ('count', 'failures', 'total_ms', 'last_ms')
+
+# task_id -> start time, local to the worker process running the task
+_started = {}
+
+
+def _key(task_name, field):
+    return f"{KEY_PREFIX}:{task_name}:{field}"
+
+
+def _incr(key, delta):
+    cache.add(key, 0, timeout=None)
+    cache.incr(key, delta)
+
+
+def task_started(task_id):
+    _started[task_id] = time.monotonic()
+
+
+def task_finished(task_id, task_name, state, queue=None):
+    started = _started.pop(task_id, None)
+    if started is None:
+        return
+    elapsed_ms = int((time.monotonic() - started) * 1000)
+    logger.info(f"Task {task_name} [{task_id}] on queue {queue} finished {state} in {elapsed_ms} ms")
+    try:
+        _incr(_key(task_name, 'count'), 1)
+        _incr(_key(task_name, 'total_ms'), elapsed_ms)
+        if state != 'SUCCESS':
+            _incr(_key(task_name, 'failures'), 1)
+        cache.set(_key(task_name, 'last_ms'), elapsed_ms, timeout=None)
+    except Exception as e:
+        # Metrics must never fail the task itself
+        logger.warning(f"Could not record timing for {task_name}: {e}")
+
+
+def get_task_timings(task_names):
+    """
+    Returns {task_name: {count, failures, total_ms, last_ms, avg_ms}} for the
+    given tasks, skipping ones that have not run yet.
+    """
+    timings = {}
+    for task_name in task_names:
+        values = cache.get_many([_key(task_name, field) for field in FIELDS])
+        stats = {field: values.get(_key(task_name, field), 0) for field in FIELDS}
+        if not stats['count']:
+            continue
+        stats['avg_ms'] = stats['total_ms'] // stats['count']
+        timings[task_name] = stats
+    return timings
+
+
+def reset_task_timings(task_names):
+    cache.delete_many([_key(task_name, field) for task_name in task_names for field in FIELDS])